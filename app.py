@@ -1,4 +1,3 @@
-import ast
 import os
 import json
 import random
@@ -9,14 +8,15 @@ import zoneinfo
 import httpx
 import asyncio
 import sqlitecloud as sq
-import csv
-import io
-from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import hmac
+import glob
+from email.utils import formatdate, parsedate_to_datetime
+from urllib.parse import quote
 from contextlib import asynccontextmanager
-from functools import wraps
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 
-from fastapi import FastAPI, Request, Form, Depends, Response, BackgroundTasks, HTTPException
+from fastapi import FastAPI, Request, Form, Depends, Response, BackgroundTasks, HTTPException, Query
 from fastapi.responses import HTMLResponse, RedirectResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
@@ -24,94 +24,166 @@ from starlette.middleware.sessions import SessionMiddleware
 from starlette.exceptions import HTTPException as StarletteHTTPException
 import socketio
 from dotenv import load_dotenv
-from googletrans import Translator
 
 # Import modules
-from modules import sendlog, sendmail, sendmailthread, del_event, detailsformat
+from modules import sendlog, sendmail, detailsformat, expire_events
 from modules import add_event as add_event_mod
 from modules import delete_event as delete_event_mod
 from modules import email_send_message
+from modules import ConnectionPool, PoolTimeout, BoundedExecutor, ExecutorSaturated
+from modules import migrate
+from modules import expiry_scheduler, try_acquire_lease, release_lease
+from modules import notifier
+from modules import translation_store, normalize_text, FragmentCache
+from modules import TranslationService, make_backend, TTLCache, TranslationFiles
+from modules import event_index, SORT_FIELDS, highlight
+from modules import calendar_chunks
+from modules import export_chunks, parse_export_scopes, EXPORT_FORMATS
+from modules import approve_requests, decline_requests, MAX_BULK
+from modules import claim_mail, deliver, record_delivery, outbox_summary, retry_mail, outbox_wakeup
+from modules.socket_broker import make_client_manager
 
 load_dotenv()
 
 ist = zoneinfo.ZoneInfo("Asia/Kolkata")
-translations_lock = threading.Lock()
-active_events = 0
 app_running_port = int(os.environ.get("PORT", 8000))
 app_running_host = "0.0.0.0"
 
-all_translations = {}
-non_file_translations = {}
-
 # --- In-Memory Stores ---
 rate_limit_store: dict[str, float] = {}  # {ip: timestamp}
-_translation_executor = ThreadPoolExecutor(max_workers=50)
-
-# --- Campaigns Cache ---
-_campaigns_cache: dict = {"data": None, "ts": 0}
-CAMPAIGNS_CACHE_TTL = 30  # seconds
+# Missing strings are batched per language and sent to TRANSLATION_BACKEND (googletrans, or fake offline)
+translation_service = TranslationService(
+    translation_store, make_backend(),
+    workers=int(os.environ.get("TRANSLATION_WORKERS", 2))
+)
+
+# --- Event Translation Cache ---
+# /translate_event results keyed by (eventid, field, sha1(text), lang); dropped when the event goes away
+event_translation_cache = TTLCache(
+    max_entries=int(os.environ.get("EVENT_TRANSLATION_CACHE_SIZE", 5000)),
+    ttl=int(os.environ.get("EVENT_TRANSLATION_CACHE_TTL", 6 * 3600))
+)
+TRANSLATE_EVENT_TIMEOUT = 20  # seconds
+
+# --- Event Index ---
+# eventdetail is kept in memory by modules.event_index and updated by addevent,
+# deletes, expire_events and likes; reloaded every EVENT_INDEX_RESYNC seconds
+# so changes made on other workers show up.
+_event_index_reload = asyncio.Lock()
+
+async def fresh_event_index(db=None):
+    """The event index, reloaded first if stale; pass the handler's `db` if it holds one."""
+    if event_index.is_stale():
+        async with _event_index_reload:
+            if event_index.is_stale():
+                if db is not None:
+                    await db_executor.run(event_index.load_from, db._c)
+                else:
+                    await run_db(event_index.load_from)
+    return event_index
+
+# --- Organizer Names ---
+# Display names for the leaderboards, so a home page view needs no user lookup
+organizer_names = TTLCache(max_entries=1000, ttl=600)
 
 # --- Helper Functions ---
 
+# New translations are journaled every few seconds and compacted into translations.bin;
+# translations.json is the tracked seed and only translation_warmup rewrites it
+translation_files = TranslationFiles(translation_store)
+
 def load_translations():
-    global all_translations
     try:
-        if os.path.exists("translations.json"):
-            with open("translations.json", "r", encoding="utf-8") as f:
-                all_translations = json.load(f)
-                print("Translations loaded successfully.")
+        source = translation_files.load()
+        print(f"Translations loaded successfully from {source}.")
     except Exception as e:
         print(f"Translation file error: {e}")
         sendlog(f"Translation file error: {e}")
 
-def save_translations():
-    global all_translations
-    try:
-        with open("translations.json", "w", encoding="utf-8") as f:
-            json.dump(all_translations, f, indent=4, ensure_ascii=False)
-    except Exception as e:
-        print(f"Error saving translation file: {e}")
-        sendlog(f"Error saving translation file: {e}")
-
-
-def translation_file_thread():
+# --- Event Expiry ---
+# One worker (the holder of the "event_expiry" lease) keeps a min-heap of end
+# times and sleeps until the next one is due; adds and deletes update the heap.
+EXPIRY_LEASE = "event_expiry"
+EXPIRY_LEASE_TTL = 60  # seconds, renewed every half TTL
+# Reload the heap so events added or deleted on other workers are picked up; an
+# event added elsewhere that ends sooner than this can expire up to this late
+EXPIRY_RESYNC = float(os.environ.get("EXPIRY_RESYNC", 60))
+EXPIRY_RETRY = 5  # first wait after an error, doubled up to EXPIRY_LEASE_TTL while errors repeat
+
+def load_event_end_times(c):
+    rows = c.execute("SELECT eventid, ends_at FROM eventdetail WHERE ends_at IS NOT NULL").fetchall()
+    return [(r["eventid"], r["ends_at"]) for r in rows]
+
+def notify_ended(ended):
+    for x in ended:
+        details = detailsformat(x)
+        etime = datetime.datetime.fromtimestamp(x["ends_at"], ist)
+        # The "Event Ended" mail was queued in the outbox by expire_events
+        invalidate_event_translations(x["eventid"])
+        sendlog(f"#EventEnd \nEvent Ended at {etime.strftime('%Y-%m-%d %H:%M:%S')}.\nEvent Details:\n\n{details}")
+
+async def expiry_loop():
+    expiry_scheduler.bind(asyncio.get_running_loop())
+    is_leader = False
+    synced_at = 0.0
+    retry = EXPIRY_RETRY
     while True:
-        time.sleep(60)
-        with translations_lock:
-            save_translations()
-            try:
-                with open("translations_backup.json", "w", encoding="utf-8") as f:
-                    json.dump(all_translations, f, indent=4, ensure_ascii=False)
-            except Exception:
-                pass
-
-def translate_thread(text, lang, save_file):
-    global all_translations
-    global non_file_translations
-    try:
-        t = Translator()
-        translated = t.translate(text, dest=lang).text
-        print(f"Translated '{text}' to '{translated}' in language '{lang}'")
-    except Exception as e:
-        print(f"Translation error: {e}")
-        translated = text
-
-    with translations_lock:
-        translate_dict = non_file_translations if not save_file else all_translations
-        existing = translate_dict.get(text, {})
-        existing[lang] = translated
-        translate_dict[text] = existing
-
-
-async def checkevent():
+        try:
+            if not await run_db(try_acquire_lease, EXPIRY_LEASE, EXPIRY_LEASE_TTL):
+                is_leader = False
+                await asyncio.sleep(EXPIRY_LEASE_TTL / 2)
+                continue
+
+            if not is_leader or time.time() - synced_at > EXPIRY_RESYNC:
+                expiry_scheduler.load(await run_db(load_event_end_times))
+                synced_at = time.time()
+                if not is_leader:
+                    print(f"Event expiry scheduler is leader, tracking {len(expiry_scheduler)} events")
+                is_leader = True
+            retry = EXPIRY_RETRY
+
+            now = int(time.time())
+            if expiry_scheduler.pop_due(now):
+                notify_ended(await run_db(expire_events, now))
+                continue
+
+            timeout = EXPIRY_LEASE_TTL / 2
+            next_due = expiry_scheduler.next_due()
+            if next_due is not None:
+                timeout = min(timeout, next_due - time.time())
+            await expiry_scheduler.wait(timeout)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"Event expiry error: {e}")
+            sendlog(f"Event expiry error: {e}")
+            # Not leader any more, so the heap (whose due entries were popped) is reloaded on retry
+            is_leader = False
+            await asyncio.sleep(retry)
+            retry = min(retry * 2, EXPIRY_LEASE_TTL)
+
+# --- Mail Outbox ---
+# Event mails are written to mail_outbox in the same transaction as the change
+# and sent from here. Claims are per row, so every worker can run this loop.
+OUTBOX_POLL = float(os.environ.get("OUTBOX_POLL", 15))
+
+async def outbox_loop():
+    outbox_wakeup.bind(asyncio.get_running_loop())
     while True:
-        await asyncio.sleep(30 + random.randint(0, 10))
         try:
-            async with httpx.AsyncClient() as client:
-                await client.get(f"http://{app_running_host}:{app_running_port}/checkeventloop")
+            rows = await run_db(claim_mail)
+            if rows:
+                sent, failures = await asyncio.to_thread(deliver, rows)
+                await run_db(record_delivery, sent, failures)
+                if failures:
+                    print(f"Outbox: {len(failures)} mail(s) failed, will retry")
+                continue
+            await outbox_wakeup.wait(OUTBOX_POLL)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"Check event loop error: {e}")
-            await asyncio.sleep(60)
+            print(f"Outbox error: {e}")
+            await asyncio.sleep(OUTBOX_POLL)
 
 # --- Rate Limiter Helper ---
 def check_rate_limit(ip: str, window: int = 30) -> tuple[bool, int]:
@@ -138,41 +210,50 @@ def check_rate_limit(ip: str, window: int = 30) -> tuple[bool, int]:
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
+    await run_db(migrate)
     load_translations()
-    threading.Thread(target=translation_file_thread, name="TranslationFileThread", daemon=True).start()
-    task = asyncio.create_task(checkevent())
+    translation_files.start()
+    print(f"Event index loaded with {await run_db(event_index.load_from)} events")
+    task = asyncio.create_task(expiry_loop())
+    outbox_task = asyncio.create_task(outbox_loop())
     print("Starting background check also")
     yield
     # Shutdown
     task.cancel()
-    _translation_executor.shutdown(wait=False)
+    outbox_task.cancel()
+    try:
+        await run_db(release_lease, EXPIRY_LEASE)
+    except Exception as e:
+        print(f"Could not release expiry lease: {e}")
+    translation_service.shutdown()
+    try:
+        await asyncio.to_thread(translation_files.stop)
+    except Exception as e:
+        print(f"Error saving translations: {e}")
+    db_executor.shutdown(wait=True)
+    db_pool.close()
+    await asyncio.to_thread(notifier.drain, float(os.environ.get("NOTIFY_DRAIN_TIMEOUT", 10)))
 
 app = FastAPI(lifespan=lifespan)
 
 # Session Middleware
-app.add_middleware(SessionMiddleware, secret_key=os.environ.get("FLASK_SECRET", "supersecretkey"))
+SECRET_KEY = os.environ.get("FLASK_SECRET", "supersecretkey")
+app.add_middleware(SessionMiddleware, secret_key=SECRET_KEY)
 
 # SocketIO Setup — single mount only
-sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins='*')
+# Set SOCKETIO_MESSAGE_QUEUE (redis:// or unix://) to share rooms and emits across workers
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins='*',
+    client_manager=make_client_manager(os.environ.get("SOCKETIO_MESSAGE_QUEUE"))
+)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 templates = Jinja2Templates(directory="templates")
 
 # --- Database Helpers ---
-# SQLiteCloud is synchronous, so we wrap DB calls in run_in_executor
-# to avoid blocking the async event loop.
-
-def sqldb(function):
-    @wraps(function)
-    def wrapper(*args, **kwargs):
-        db = sq.connect(os.environ.get("SQLITECLOUD"))
-        db.row_factory = sq.Row
-        c = db.cursor()
-        final = function(c, *args, **kwargs)
-        db.commit()
-        db.close()
-        return final
-    return wrapper
+# SQLiteCloud is synchronous, so DB calls run on the dedicated db_executor
+# to avoid blocking the async event loop or the shared default executor.
 
 def _sync_get_db_conn():
     """Opens a synchronous SQLiteCloud connection."""
@@ -180,60 +261,103 @@ def _sync_get_db_conn():
     db.row_factory = sq.Row
     return db
 
-async def run_query(query: str, params: tuple = (), fetchmode: str = "all"):
+# Shared by AsyncDB, run_db and sync_db so connection setup is paid once per slot
+db_pool = ConnectionPool(
+    _sync_get_db_conn,
+    max_size=int(os.environ.get("DB_POOL_SIZE", 10)),
+    max_idle=int(os.environ.get("DB_POOL_MAX_IDLE", 300)),
+    acquire_timeout=float(os.environ.get("DB_POOL_TIMEOUT", 10)),
+)
+
+# Sized to the pool so every DB worker can hold a connection; callers beyond
+# max_queue get ExecutorSaturated (503) instead of piling up.
+db_executor = BoundedExecutor(
+    max_workers=db_pool.max_size,
+    max_queue=int(os.environ.get("DB_EXECUTOR_QUEUE", 100)),
+)
+
+async def acquire_db():
     """
-    Run a single SELECT query asynchronously using run_in_executor.
-    fetchmode: "all", "one", or "none" (for INSERT/UPDATE/DELETE)
+    A pooled connection. Waiting for a free pool slot happens on the default
+    executor: a DB worker blocked in acquire would starve the requests that
+    already hold connections and need a worker to use them.
     """
-    loop = asyncio.get_event_loop()
+    return await asyncio.get_running_loop().run_in_executor(None, db_pool.acquire)
 
-    def _execute():
-        db = _sync_get_db_conn()
-        c = db.cursor()
+async def run_db(function, *args, **kwargs):
+    """
+    Runs function(cursor, *args, **kwargs) on the DB executor with a
+    connection acquired beforehand, commits and returns its result. The job
+    hands the connection back itself, so a cancelled caller cannot release it
+    while it is still in use.
+    """
+    if db_executor.saturated():
+        raise ExecutorSaturated("DB executor saturated")
+    db = await acquire_db()
+
+    def _job():
         try:
-            c.execute(query, params)
-            if fetchmode == "all":
-                result = c.fetchall()
-            elif fetchmode == "one":
-                result = c.fetchone()
-            else:
-                result = None
-            db.commit()
-            return result
-        finally:
-            db.close()
+            result = function(db.cursor(), *args, **kwargs)
+        except BaseException:
+            close_db(db, failed=True)
+            raise
+        close_db(db)
+        return result
 
-    return await loop.run_in_executor(None, _execute)
+    def _never_ran(future):
+        if future.cancelled():
+            db_pool.release(db)
 
-async def run_queries_parallel(*queries):
+    try:
+        future = db_executor.submit(_job)
+    except BaseException:
+        db_pool.release(db)
+        raise
+    future.add_done_callback(_never_ran)
+    return await asyncio.wrap_future(future)
+
+async def run_query(query: str, params: tuple = (), fetchmode: str = "all"):
     """
-    Run multiple (query, params, fetchmode) tuples in parallel.
-    Returns results in the same order.
+    Run a single query asynchronously on the DB executor.
+    fetchmode: "all", "one", or "none" (for INSERT/UPDATE/DELETE)
     """
-    tasks = [run_query(q, p, f) for q, p, f in queries]
-    return await asyncio.gather(*tasks)
+    def _execute(c):
+        c.execute(query, params)
+        if fetchmode == "all":
+            return c.fetchall()
+        if fetchmode == "one":
+            return c.fetchone()
+        return None
+
+    return await run_db(_execute)
 
-# --- Synchronous DB for non-async contexts (SocketIO, background tasks) ---
+# --- Synchronous DB for sync routes (Starlette's threadpool); never from a DB executor job ---
 def sync_db():
-    db = _sync_get_db_conn()
-    db.row_factory = sq.Row
+    db = db_pool.acquire()
     c = db.cursor()
     return db, c
 
-def close_db(db):
-    db.commit()
-    db.close()
+def close_db(db, failed=False):
+    """Commits and hands the connection back to the pool (rolled back and dropped on failure)."""
+    if failed:
+        db_pool.release(db, rollback=True)
+        return
+    try:
+        db.commit()
+    except Exception:
+        db_pool.release(db, discard=True)
+        raise
+    db_pool.release(db)
 
 # --- FastAPI DB Dependency (async-safe) ---
 class AsyncDB:
-    """Async-compatible DB wrapper for use in route handlers."""
-    def __init__(self):
-        self._db = _sync_get_db_conn()
+    """Async-compatible DB wrapper for use in route handlers, backed by a pooled connection."""
+    def __init__(self, conn):
+        self._db = conn
         self._c = self._db.cursor()
-        self._loop = asyncio.get_event_loop()
 
     def _run(self, fn):
-        return self._loop.run_in_executor(None, fn)
+        return db_executor.run(fn)
 
     async def execute(self, query, params=()):
         def _do():
@@ -252,22 +376,93 @@ class AsyncDB:
             return self._c.fetchall()
         return await self._run(_do)
 
+    async def query_one(self, query, params=()):
+        """execute + fetchone in a single executor hop."""
+        def _do():
+            return self._c.execute(query, params).fetchone()
+        return await self._run(_do)
+
+    async def query_all(self, query, params=()):
+        """execute + fetchall in a single executor hop."""
+        def _do():
+            return self._c.execute(query, params).fetchall()
+        return await self._run(_do)
+
     async def commit(self):
         def _do():
             self._db.commit()
         await self._run(_do)
 
-    def close(self):
-        self._db.close()
+    def close(self, failed=False):
+        db_pool.release(self._db, rollback=failed)
 
-async def get_db():
-    adb = AsyncDB()
+# userdetails row plus liked event ids and owned event count from the join tables
+USER_DETAILS_QUERY = """SELECT u.*,
+    (SELECT group_concat(l.eventid) FROM event_likes l WHERE l.username = u.username) AS liked_csv,
+    (SELECT COUNT(*) FROM event_owners o WHERE o.username = u.username) AS event_count
+    FROM userdetails u WHERE u.username=?"""
+
+def userdetails_dict(row):
+    ud = dict(row)
+    # Legacy comma-joined columns are no longer maintained
+    ud.pop("events", None)
+    ud.pop("likes", None)
+    liked = ud.pop("liked_csv", None)
+    ud["liked_ids"] = liked.split(",") if liked else []
+    return ud
+
+@asynccontextmanager
+async def open_db():
+    """get_db for handlers that only need a connection on some paths."""
+    if db_executor.saturated():
+        raise ExecutorSaturated("DB executor saturated")
+    adb = AsyncDB(await acquire_db())
     try:
         yield adb
         await adb.commit()
-    finally:
+    except Exception:
+        adb.close(failed=True)
+        raise
+    else:
         adb.close()
 
+async def get_db():
+    async with open_db() as adb:
+        yield adb
+
+# --- Conditional GET ---
+# Pages built from event rows carry a strong ETag made of the events' content
+# tags (from the event index) plus what else the render depends on, so a
+# revalidation is answered with 304 before any DB access or rendering.
+TEMPLATE_STAMP = str(max(os.path.getmtime(p) for p in glob.glob("templates/*.html")))
+
+def page_etag(request: Request, *parts):
+    session = request.session
+    key = "|".join(map(str, (*parts, session.get("username"), session.get("lang", "en"),
+                             translation_store.version, TEMPLATE_STAMP)))
+    return f'"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+def validator_headers(etag, modified, private=True):
+    headers = {"ETag": etag, "Last-Modified": formatdate(modified, usegmt=True)}
+    if private:
+        headers.update({"Cache-Control": "private, no-cache", "Vary": "Cookie"})
+    else:
+        headers["Cache-Control"] = "no-cache"
+    return headers
+
+def is_not_modified(request: Request, etag, modified):
+    """If-None-Match wins; If-Modified-Since is only used without it."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
 # --- Template Filters & Globals ---
 
 def datetimeformat(value):
@@ -280,39 +475,61 @@ def datetimeformat(value):
 
 templates.env.filters["datetimeformat"] = datetimeformat
 
+# Static, language-only template chrome; see {% call fragment(...) %} in the templates
+fragment_cache = FragmentCache(lambda: translation_store.version)
+templates.env.globals["fragment"] = fragment_cache.jinja_tag()
+
 def translate_text(text, lang=None, save_file=True):
-    global all_translations
-    global non_file_translations
-    text = text.replace("\n", "")
-    text = " ".join(text.split())
+    text = normalize_text(text)
     if not lang or lang == "en":
         return text
-    combined_translations = {**all_translations, **non_file_translations}
-    if not combined_translations.get(text) or not combined_translations.get(text).get(lang):
-        # Use thread pool instead of spawning raw threads
-        _translation_executor.submit(translate_thread, text, lang, save_file)
-    translationss = all_translations if save_file else non_file_translations
-    return translationss.get(text, {}).get(lang, text)
+    translated = translation_store.get(text, lang)
+    if translated is None:
+        # Shown in English this time; the service fills it in for later renders
+        translation_service.request(text, lang, save_file)
+        return text
+    return translated
+
+def invalidate_event_translations(eventid):
+    event_translation_cache.discard_where(lambda key: key[0] == eventid)
 
 @app.post("/translate_event")
 async def translate_event(request: Request):
     data = await request.json()
     lang = request.session.get("lang", "en")
-    output = {}
-    threads = []
-
-    def transl(text, lang, key):
-        t = Translator()
-        translated = t.translate(text, dest=lang).text
-        output[key] = translated
-
-    for field, value in data.items():
-        threads.append(threading.Thread(target=transl, args=(value, lang, field)))
-
-    for x in threads:
-        x.start()
-    for x in threads:
-        x.join()
+    eventid = data.pop("eventid", None)
+    eventid = int(eventid) if str(eventid).isdigit() else None
+    fields = {k: str(v) for k, v in data.items() if isinstance(v, (str, int, float)) and str(v).strip()}
+
+    output, pending = {}, {}
+    for field, value in fields.items():
+        key = (eventid, field, hashlib.sha1(value.encode()).hexdigest(), lang)
+        cached = event_translation_cache.get(key)
+        if cached is not None:
+            output[field] = cached
+        else:
+            # Shared with any identical request already in flight; kept out of translations.json
+            pending[field] = (key, translation_service.request(value, lang, save_file=False, store=False))
+
+    if pending:
+        try:
+            # shield: the Futures are shared with other requests, so a timeout here must not cancel them
+            results = await asyncio.wait_for(
+                asyncio.gather(*(asyncio.shield(asyncio.wrap_future(f)) for _, f in pending.values()),
+                               return_exceptions=True),
+                timeout=TRANSLATE_EVENT_TIMEOUT
+            )
+        except asyncio.TimeoutError:
+            return JSONResponse(content={"error": "Translation timed out"}, status_code=504)
+        results = [None if isinstance(r, Exception) else r for r in results]
+        if all(r is None for r in results):
+            return JSONResponse(content={"error": "Translation failed"}, status_code=502)
+        for (field, (key, _)), result in zip(pending.items(), results):
+            if result is None:
+                output[field] = fields[field]
+            else:
+                event_translation_cache.set(key, result)
+                output[field] = result
 
     return JSONResponse(content=output)
 
@@ -320,20 +537,44 @@ async def translate_event(request: Request):
 
 @app.exception_handler(StarletteHTTPException)
 async def custom_http_exception_handler(request, exc):
-    return templates.TemplateResponse("error.html", {
-        "request": request,
+    return templates.TemplateResponse(request, "error.html", {
         "status_code": exc.status_code,
         "detail": exc.detail
     }, status_code=exc.status_code)
 
+@app.exception_handler(ExecutorSaturated)
+@app.exception_handler(PoolTimeout)
+async def db_busy_exception_handler(request, exc):
+    return templates.TemplateResponse(request, "error.html", {
+        "status_code": 503,
+        "detail": "Server is busy, please try again shortly."
+    }, status_code=503, headers={"Retry-After": "2"})
+
 @app.exception_handler(500)
 async def internal_exception_handler(request, exc):
-    return templates.TemplateResponse("error.html", {
-        "request": request,
+    return templates.TemplateResponse(request, "error.html", {
         "status_code": 500,
         "detail": "Internal Server Error"
     }, status_code=500)
 
+async def organizer_leaderboard(events, n=5, by="events", db=None):
+    """
+    Top n organizers from the event index as [{"username", "name", "count"}].
+    Names are looked up on `db` when the caller holds a connection, so it does
+    not wait for a second one.
+    """
+    top = events.top_organizers(n, by)
+    names = {u: organizer_names.get(u) for u, _ in top}
+    missing = [u for u, name in names.items() if name is None]
+    if missing:
+        query = f"SELECT username, name FROM userdetails WHERE username IN ({', '.join('?' * len(missing))})"
+        rows = await (db.query_all(query, tuple(missing)) if db is not None else run_query(query, tuple(missing)))
+        for r in rows:
+            organizer_names.set(r["username"], r["name"])
+            names[r["username"]] = r["name"]
+    # Like the old join, owners without a userdetails row are left out
+    return [{"username": u, "name": names[u], "count": count} for u, count in top if names[u] is not None]
+
 # --- Routes ---
 
 @app.get("/")
@@ -345,44 +586,31 @@ async def home(request: Request, db: AsyncDB = Depends(get_db)):
     if not session.get("lang"):
         return templates.TemplateResponse(request, "selectlanguage.html")
 
-    global active_events
+    events = await fresh_event_index(db)
 
     isadmin = False
     userdetails = {}
-    top_organizers = []
     admin_stats = {}
 
     if currentuname:
-        await db.execute("SELECT * FROM userdetails WHERE username=?", (currentuname,))
-        ud = await db.fetchone()
+        ud = await db.query_one(USER_DETAILS_QUERY, (currentuname,))
         if ud:
             if ud["role"] == "admin":
                 isadmin = True
-                # Run all admin stat queries in parallel
-                results = await run_queries_parallel(
-                    ("SELECT COUNT(*) as count FROM userdetails", (), "one"),
-                    ("SELECT COUNT(*) as count FROM eventreq", (), "one"),
-                    ("SELECT COUNT(*) as count FROM eventdetail", (), "one"),
-                )
+                # One query on the connection this request already holds
+                counts = await db.query_one(
+                    "SELECT (SELECT COUNT(*) FROM userdetails) AS users, (SELECT COUNT(*) FROM eventreq) AS pending")
                 admin_stats = {
-                    "total_users": results[0]["count"],
-                    "pending_requests": results[1]["count"],
+                    "total_users": counts["users"],
+                    "pending_requests": counts["pending"],
                     "active_threads": threading.active_count(),
-                    "total_events": results[2]["count"]
+                    "total_events": len(events)
                 }
-            userdetails = dict(ud)
-
-    # Leaderboard Logic (Top 5 Organizers)
-    await db.execute("SELECT name, username, events FROM userdetails")
-    all_users = await db.fetchall()
-    organizers = []
-    for u in all_users:
-        event_count = len(u["events"].split(",")) if u["events"] else 0
-        if event_count > 0:
-            organizers.append({"name": u["name"], "username": u["username"], "count": event_count})
+            userdetails = userdetails_dict(ud)
 
-    organizers.sort(key=lambda x: x["count"], reverse=True)
-    top_organizers = organizers[:5]
+    # Leaderboards (Top 5 Organizers by events and by likes), kept by the event index
+    top_organizers = await organizer_leaderboard(events, 5, "events", db)
+    top_liked_organizers = await organizer_leaderboard(events, 5, "likes", db)
 
     template_name = session.get("template", "index.html")
     user_lang = session.get("lang", "en")
@@ -391,7 +619,7 @@ async def home(request: Request, db: AsyncDB = Depends(get_db)):
         return translate_text(text.strip(), lang=user_lang, save_file=save_file)
 
     return templates.TemplateResponse(request, template_name, {
-        "active_events_length": active_events,
+        "active_events_length": len(events),
         "fullname": currentuser,
         "c_user": str(currentuname).strip(),
         "isadmin": bool(isadmin),
@@ -400,25 +628,33 @@ async def home(request: Request, db: AsyncDB = Depends(get_db)):
         "user_language": user_lang,
         "fvalues": {},
         "top_organizers": top_organizers,
+        "top_liked_organizers": top_liked_organizers,
         "admin_stats": admin_stats
     })
 
 @app.get("/event/{eventid}")
-async def eventfromeventid(request: Request, eventid: int, db: AsyncDB = Depends(get_db)):
+async def eventfromeventid(request: Request, eventid: int):
     session = request.session
-    await db.execute("SELECT * FROM eventdetail WHERE eventid=(?)", (eventid, ))
-    getevent = await db.fetchone()
+    stamp = (await fresh_event_index()).stamp(eventid)
+    headers = {}
+    if stamp:
+        headers = validator_headers(page_etag(request, "event", eventid, stamp[0]), stamp[1])
+        if is_not_modified(request, headers["ETag"], stamp[1]):
+            return Response(status_code=304, headers=headers)
+
     isadmin = False
     currentuname = session.get("username")
     user_lang = session.get("lang", "en")
     ud = {}
 
-    if currentuname:
-        await db.execute("SELECT * FROM userdetails WHERE username=?", (currentuname,))
-        ud = await db.fetchone()
-        if ud:
-            if ud["role"] == "admin":
-                isadmin = True
+    async with open_db() as db:
+        getevent = await db.query_one("SELECT * FROM eventdetail WHERE eventid=(?)", (eventid, ))
+        if currentuname:
+            row = await db.query_one(USER_DETAILS_QUERY, (currentuname,))
+            if row:
+                ud = userdetails_dict(row)
+                if ud["role"] == "admin":
+                    isadmin = True
 
     def bound_translate(text, save_file=True):
         return translate_text(text.strip(), lang=user_lang, save_file=save_file)
@@ -430,7 +666,7 @@ async def eventfromeventid(request: Request, eventid: int, db: AsyncDB = Depends
         "translate": bound_translate,
         "user_language": user_lang,
         "userdetails": ud
-    })
+    }, headers=headers if getevent else {})
 
 @app.post("/forgetpassword")
 async def forgetpassword(request: Request, db: AsyncDB = Depends(get_db)):
@@ -444,8 +680,7 @@ async def forgetpassword(request: Request, db: AsyncDB = Depends(get_db)):
 
     splited = otp.split("_")
 
-    await db.execute("SELECT email FROM userdetails WHERE email=(?) OR username=(?)", (formemail,formemail))
-    email = await db.fetchone()
+    email = await db.query_one("SELECT email FROM userdetails WHERE email=(?) OR username=(?)", (formemail,formemail))
     email = email["email"]
 
     if (splited[0] != formotp) or (splited[1] != email):
@@ -470,8 +705,7 @@ async def sendforgetotp(request: Request, email: str = Form(...), db: AsyncDB =
             status_code=429
         )
 
-    getemail = await db.execute("SELECT email FROM userdetails WHERE email=(?) OR username=(?)", (email,email))
-    getemail = await db.fetchone()
+    getemail = await db.query_one("SELECT email FROM userdetails WHERE email=(?) OR username=(?)", (email,email))
 
     if not getemail:
         return Response(content="Email/Username doesnt exists! Please try different email.", media_type="text/plain")
@@ -479,7 +713,7 @@ async def sendforgetotp(request: Request, email: str = Form(...), db: AsyncDB =
     email = getemail["email"]
     otp = random.randint(1111,9999)
     request.session["forgetotp"] = f"{otp}_{email}"
-    sendmailthread(email, "Reset Password OTP For Sahyog Sutra", f"Use this OTP to reset your password in the Sahyog Setu!\n\nOTP: {otp}")
+    sendmail(email, "Reset Password OTP For Sahyog Sutra", f"Use this OTP to reset your password in the Sahyog Setu!\n\nOTP: {otp}")
     return Response(content=f"OTP Sent to {email}! Please check spam folder if can't find it.", media_type="text/plain")
 
 
@@ -494,15 +728,14 @@ async def sendotp(request: Request, email: str = Form(...), db: AsyncDB = Depend
             status_code=429
         )
 
-    await db.execute("SELECT * FROM userdetails WHERE email=?", (email,))
-    checkexists = await db.fetchone()
+    checkexists = await db.query_one("SELECT * FROM userdetails WHERE email=?", (email,))
     if checkexists:
         return Response(content="Email already exists! Please try different email.", media_type="text/plain")
 
     otp = random.randint(1111, 9999)
     request.session["signupotp"] = f"{otp}_{email}"
 
-    sendmailthread(email, "Signup OTP For Sahyog Sutra", email_send_message(otp), type="html")
+    sendmail(email, "Signup OTP For Sahyog Sutra", email_send_message(otp), type="html")
     return Response(content=f"OTP Sent to {email}! Please check spam folder if can't find it.", media_type="text/plain")
 
 @app.post("/setlanguage/{lang}")
@@ -557,37 +790,57 @@ async def generate_ai_description(request: Request):
         print(f"AI Description Generation Error: {e}")
         return Response(content="Error generating description. Please try again later.", media_type="text/plain", status_code=500)
 
+CHAT_PAGE_SIZE = 50
+
+async def fetch_chat_page(db, eventid, before=None, limit=CHAT_PAGE_SIZE):
+    """Up to `limit` messages older than id `before` (newest page if None), oldest first."""
+    if before is None:
+        rows = await db.query_all(
+            "SELECT id, username, message, created_at FROM chat_messages WHERE eventid=? ORDER BY id DESC LIMIT ?",
+            (eventid, limit)
+        )
+    else:
+        rows = await db.query_all(
+            "SELECT id, username, message, created_at FROM chat_messages WHERE eventid=? AND id<? ORDER BY id DESC LIMIT ?",
+            (eventid, before, limit)
+        )
+    return [dict(row) for row in reversed(rows)]
+
 @app.get("/group-chat/from-event/{eventid}")
 async def group_chat_from_event(request: Request, eventid: int, db: AsyncDB = Depends(get_db)):
     currentuname = request.session.get("username", "anonymous")
 
-    await db.execute("SELECT * FROM eventdetail WHERE eventid=?", (eventid,))
-    eventdetail = await db.fetchone()
+    eventdetail = await db.query_one("SELECT * FROM eventdetail WHERE eventid=?", (eventid,))
     if not eventdetail:
         return Response(content="No such event found.", media_type="text/plain")
 
-    await db.execute("SELECT * FROM messages2 WHERE eventid=?", (eventid,))
-    all_msgs_row = await db.fetchone()
-    all_msgs_str = all_msgs_row["msgs"] if all_msgs_row else None
-
-    if all_msgs_str:
-        all_msgs = ast.literal_eval(all_msgs_str)
-    else:
-        all_msgs = []
-
-    messages = [(x[0], x[1], x[2]) for x in all_msgs] if all_msgs else []
+    # Latest page only; older history is pulled by /group-chat/{eventid}/messages on scroll
+    latest = await fetch_chat_page(db, eventid)
+    total = await db.query_one("SELECT COUNT(*) AS count FROM chat_messages WHERE eventid=?", (eventid,))
+    messages = [(m["username"], m["message"], m["created_at"]) for m in latest]
 
     return templates.TemplateResponse(request, "groupchat.html", {
         "messages": messages,
+        "total_msgs": total["count"],
+        "oldest_id": latest[0]["id"] if latest else None,
+        "page_size": CHAT_PAGE_SIZE,
         "eventid": eventid,
         "currentuname": currentuname,
         "eventname": eventdetail["eventname"]
     })
 
+@app.get("/group-chat/{eventid}/messages")
+async def group_chat_history(eventid: int, before: Optional[int] = None, limit: int = CHAT_PAGE_SIZE, db: AsyncDB = Depends(get_db)):
+    limit = max(1, min(limit, 200))
+    page = await fetch_chat_page(db, eventid, before, limit)
+    return JSONResponse(content={
+        "messages": page,
+        "next_before": page[0]["id"] if len(page) == limit else None
+    })
+
 @app.get("/user/{username}")
 async def user_profile(request: Request, username: str, db: AsyncDB = Depends(get_db)):
-    await db.execute("SELECT * FROM userdetails WHERE username=?", (username,))
-    userfulldetails = await db.fetchone()
+    userfulldetails = await db.query_one(USER_DETAILS_QUERY, (username,))
     if not userfulldetails:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -600,7 +853,7 @@ async def user_profile(request: Request, username: str, db: AsyncDB = Depends(ge
     is_own_profile = (current_user == username)
 
     return templates.TemplateResponse(request, "userprofile.html", {
-        "userdetails": dict(userfulldetails),
+        "userdetails": userdetails_dict(userfulldetails),
         "translate": bound_translate,
         "is_own_profile": is_own_profile
     })
@@ -611,6 +864,17 @@ async def changetemplate(request: Request):
     request.session["template"] = "index2.html" if ct == "index.html" else "index.html"
     return Response(content="Template Changed", media_type="text/plain")
 
+_categories = (None, {})  # (events.json mtime, parsed)
+
+def event_categories():
+    """events.json, parsed once and again only when the file changes."""
+    global _categories
+    mtime = os.path.getmtime("events.json")
+    if _categories[0] != mtime:
+        with open("events.json", "r") as f:
+            _categories = (mtime, json.load(f))
+    return _categories[1]
+
 @app.get("/show_add_form")
 async def show_add_form(request: Request):
     fi = ["eventname", "email", "starttime", "endtime", "eventstartdate", "enddate", "location", "category", "description"]
@@ -620,83 +884,169 @@ async def show_add_form(request: Request):
     def bound_translate(text, save_file=True):
         return translate_text(text.strip(), lang=user_lang, save_file=save_file)
 
-    categories = {}
-    with open("events.json", "r") as f:
-        categories = json.load(f)
-
     return templates.TemplateResponse(request, "addevent.html", {
         "fvalues": fv,
         "translate": bound_translate,
-        "categories": categories
+        "categories": event_categories()
     })
 
-@app.get("/show_campaigns")
-async def show_campaigns(request: Request, db: AsyncDB = Depends(get_db)):
-    global _campaigns_cache, active_events
+# --- Campaigns ---
+# The campaigns page renders CAMPAIGNS_PREVIEW cards per category; further
+# pages, searches and other orderings come from /campaigns, one page at a time.
+CAMPAIGNS_PREVIEW = 4
+CAMPAIGNS_PAGE_SIZE = 12
+CAMPAIGNS_MAX_PAGE = 100
+
+async def campaign_card_context(request: Request, db: AsyncDB):
+    """Template values the event cards need for the current user."""
     currentuname = request.session.get("username")
     user_lang = request.session.get("lang", "en")
-
-    # Serve from cache if fresh
-    if _campaigns_cache["data"] and time.time() - _campaigns_cache["ts"] < CAMPAIGNS_CACHE_TTL:
-        cached = _campaigns_cache["data"]
-        edetailslist = cached["edetailslist"]
-        trending_events = cached["trending_events"]
-        allevents = cached["allevents"]
-        alleventscat = cached["alleventscat"]
-        active_events = cached["active_events"]
-    else:
-        await db.execute("SELECT * FROM eventdetail")
-        edetailslist = [dict(row) for row in await db.fetchall()]
-
-        trending_events = sorted(edetailslist, key=lambda x: x['likes'], reverse=True)[:4]
-
-        alleventscat = list({x["category"] for x in edetailslist})
-        allevents = {}
-        for x in edetailslist:
-            allevents.setdefault(x["category"], []).append(x)
-
-        active_events = sum(len(v) for v in allevents.values())
-
-        _campaigns_cache = {
-            "data": {
-                "edetailslist": edetailslist,
-                "trending_events": trending_events,
-                "allevents": allevents,
-                "alleventscat": alleventscat,
-                "active_events": active_events,
-            },
-            "ts": time.time()
-        }
-
     isadmin = False
     userdetails = {}
     if currentuname:
-        await db.execute("SELECT * FROM userdetails WHERE username=?", (currentuname,))
-        ud = await db.fetchone()
+        ud = await db.query_one(USER_DETAILS_QUERY, (currentuname,))
         if ud and ud["role"] == "admin":
             isadmin = True
-        userdetails = dict(ud) if ud else {}
-
-    viewuserevent = request.session.pop("vieweventusername", str(currentuname))
-    ve = request.session.pop("viewyourevents", False)
-    sortby = request.session.get("sortby", "eventstartdate")
+        userdetails = userdetails_dict(ud) if ud else {}
 
     def bound_translate(text, save_file=True):
         return translate_text(text.strip(), lang=user_lang, save_file=save_file)
 
-    return templates.TemplateResponse(request, "campaigns.html", {
-        "allevents": allevents,
+    return {
         "userdetails": userdetails,
-        "viewyourevents": ve,
-        "sortby": sortby,
         "isadmin": bool(isadmin),
         "c_user": str(currentuname).strip(),
-        "viewuserevent": viewuserevent,
         "translate": bound_translate,
-        "trending_events": trending_events,
         "user_language": user_lang
+    }
+
+@app.get("/show_campaigns")
+async def show_campaigns(request: Request):
+    currentuname = request.session.get("username")
+    sortby = request.session.get("sortby", "eventstartdate")
+    if sortby not in SORT_FIELDS:
+        sortby = "eventstartdate"
+
+    events = await fresh_event_index()
+    headers = {}
+    if not request.session.get("viewyourevents"):  # that view is one-off, popped below
+        tag, modified = events.listing_stamp()
+        headers = validator_headers(page_etag(request, "campaigns", tag, sortby), modified)
+        if is_not_modified(request, headers["ETag"], modified):
+            return Response(status_code=304, headers=headers)
+
+    viewuserevent = request.session.pop("vieweventusername", str(currentuname))
+    ve = request.session.pop("viewyourevents", False)
+    sections = []
+    for category in events.categories():
+        rows, next_cursor, total = events.query(
+            categories=[category], owner=viewuserevent if ve else None, sort=sortby,
+            limit=None if ve else CAMPAIGNS_PREVIEW
+        )
+        if total:
+            sections.append({"name": category, "events": rows, "next": next_cursor, "total": total})
+
+    async with open_db() as db:
+        card_context = await campaign_card_context(request, db)
+    return templates.TemplateResponse(request, "campaigns.html", {
+        **card_context,
+        "sections": sections,
+        "viewyourevents": ve,
+        "sortby": sortby,
+        "viewuserevent": viewuserevent,
+        "trending_events": events.trending(4),
+        "preview_size": CAMPAIGNS_PREVIEW,
+        "page_size": CAMPAIGNS_PAGE_SIZE
+    }, headers=headers)
+
+@app.get("/campaigns")
+async def campaigns(
+    request: Request,
+    category: Optional[List[str]] = Query(None),
+    q: str = "",
+    date_from: Optional[datetime.date] = None,
+    date_to: Optional[datetime.date] = None,
+    owner: Optional[str] = None,
+    sort: str = "eventstartdate",
+    order: str = "asc",
+    after: Optional[str] = None,
+    limit: int = CAMPAIGNS_PAGE_SIZE,
+    format: str = "html"
+):
+    """
+    One page of active events, filtered and sorted server-side. Returns the
+    event cards as an HTML fragment (format=json for the rows); the cursor
+    for the next page is in X-Next-Cursor and the match count in X-Total-Count.
+    """
+    events = await fresh_event_index()
+    tag, modified = events.listing_stamp()
+    validators = validator_headers(page_etag(request, "campaigns-page", tag, request.url.query), modified)
+    if is_not_modified(request, validators["ETag"], modified):
+        return Response(status_code=304, headers=validators)
+    try:
+        rows, next_cursor, total = events.query(
+            categories=category, text=q.strip() or None,
+            date_from=date_from.isoformat() if date_from else None,
+            date_to=date_to.isoformat() if date_to else None,
+            owner=owner, sort=sort, descending=order == "desc", after=after,
+            limit=max(1, min(limit, CAMPAIGNS_MAX_PAGE))
+        )
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+
+    headers = {"X-Total-Count": str(total), **validators}
+    if next_cursor:
+        headers["X-Next-Cursor"] = next_cursor
+    if format == "json":
+        return JSONResponse(content={"events": rows, "next": next_cursor, "total": total}, headers=headers)
+    async with open_db() as db:
+        card_context = await campaign_card_context(request, db)
+    return templates.TemplateResponse(request, "campaign_cards.html", {
+        **card_context,
+        "cards": rows
+    }, headers=headers)
+
+@app.get("/search")
+async def search(q: str = "", category: Optional[List[str]] = Query(None), limit: int = 20):
+    """Ranked full-text search over active events, with matches wrapped in <mark>."""
+    started = time.perf_counter()
+    events = await fresh_event_index()
+    def in_category(eid):
+        return (events.get(eid) or {}).get("category") in category
+
+    results = []
+    for eventid, score in events.search.search(q, max(1, min(limit, CAMPAIGNS_MAX_PAGE)), in_category if category else None):
+        e = events.get(eventid)
+        if e is None:
+            continue
+        results.append({
+            "eventid": eventid,
+            "score": round(score, 3),
+            "eventname": e["eventname"],
+            "category": e["category"],
+            "location": e["location"],
+            "eventstartdate": e["eventstartdate"],
+            "eventenddate": e["eventenddate"],
+            "highlight": {
+                "eventname": highlight(e["eventname"], q),
+                "category": highlight(e["category"], q),
+                "location": highlight(e["location"], q),
+                "description": highlight(e["description"], q, width=160),
+            },
+        })
+    return JSONResponse(content={
+        "query": q,
+        "results": results,
+        "took_ms": round((time.perf_counter() - started) * 1000, 2),
     })
 
+@app.get("/leaderboard")
+async def leaderboard(by: str = "events", limit: int = 5):
+    if by not in ("events", "likes"):
+        return JSONResponse(content={"error": "by must be events or likes"}, status_code=400)
+    events = await fresh_event_index()
+    return JSONResponse(content=await organizer_leaderboard(events, max(1, min(limit, 100)), by))
+
 @app.post("/viewyourevents/{username}")
 async def viewyourevents(request: Request, username: str):
     request.session["viewyourevents"] = True
@@ -719,14 +1069,13 @@ async def signup(request: Request, db: AsyncDB = Depends(get_db)):
     otp = form_data.get("signupotp")
     session_otp = str(request.session.get("signupotp"))
 
-    # Run both existence checks in parallel
-    results = await run_queries_parallel(
-        ("SELECT username FROM userdetails WHERE username=?", (username,), "one"),
-        ("SELECT email FROM userdetails WHERE email=?", (email,), "one"),
-    )
-    if results[0]:
+    # Both existence checks in one query, on the connection this request already holds
+    taken = await db.query_one(
+        "SELECT EXISTS(SELECT 1 FROM userdetails WHERE username=?) AS username, EXISTS(SELECT 1 FROM userdetails WHERE email=?) AS email",
+        (username, email))
+    if taken["username"]:
         return Response(content="Username Already Exists", media_type="text/plain")
-    if results[1]:
+    if taken["email"]:
         return Response(content="Email Already Exists", media_type="text/plain")
 
     if (session_otp.split("_")[0] != str(otp).strip()):
@@ -755,11 +1104,10 @@ async def login(request: Request, db: AsyncDB = Depends(get_db)):
     username = form_data.get("loginusername").lower()
     password = form_data.get("loginpassword")
 
-    await db.execute(
+    fetched = await db.query_one(
         "SELECT * FROM userdetails WHERE username=? OR email=?",
         (username, username)
     )
-    fetched = await db.fetchone()
     if not fetched:
         return Response(content="No username found", media_type="text/plain")
     elif password != fetched["password"]:
@@ -776,69 +1124,54 @@ async def addnewevent(request: Request, db: AsyncDB = Depends(get_db)):
     form_data = await request.form()
     session_username = request.session.get("username")
     target_username = session_username
+    request_owner = None
 
     if session_username:
-        await db.execute("SELECT role FROM userdetails WHERE username=?", (session_username,))
-        user_row = await db.fetchone()
+        user_row = await db.query_one("SELECT role FROM userdetails WHERE username=?", (session_username,))
         if user_row and user_row["role"] == "admin":
             if form_data.get("username"):
-                target_username = form_data.get("username")
-                try:
-                    await db.execute(
-                        "DELETE FROM eventreq WHERE eventname=? AND username=?",
-                        (form_data.get("eventname"), target_username)
-                    )
-                except Exception as e:
-                    print(f"Error cleaning up eventreq: {e}")
-
-    # Module still uses sync cursor — wrap in executor
-    loop = asyncio.get_event_loop()
-    res = await loop.run_in_executor(
-        None,
-        lambda: add_event_mod.addevent(db._c, dict(form_data), target_username)
-    )
+                target_username = request_owner = form_data.get("username")
+
+    # Module still uses sync cursor — wrap in executor; the request row goes in the same transaction
+    res = await db_executor.run(add_event_mod.addevent, db._c, dict(form_data), target_username, request_owner)
     return Response(content=res, media_type="text/plain")
 
 @app.post("/addeventreq")
 async def addeventreq(request: Request, db: AsyncDB = Depends(get_db)):
     form_data = await request.form()
-    loop = asyncio.get_event_loop()
-    res = await loop.run_in_executor(
-        None,
-        lambda: add_event_mod.addeventrequest(db._c, dict(form_data), request.session)
-    )
+    res = await db_executor.run(add_event_mod.addeventrequest, db._c, dict(form_data), request.session)
     return Response(content=res, media_type="text/plain")
 
+PENDING_PAGE_SIZE = 25
+
 @app.get("/show_pending_events")
-async def pendingevents(request: Request, db: AsyncDB = Depends(get_db)):
+async def pendingevents(request: Request, after: int = 0, limit: int = PENDING_PAGE_SIZE, db: AsyncDB = Depends(get_db)):
+    """One page of event requests, oldest first; `after` is the last event id of the previous page."""
     uname = request.session.get("username")
     if not uname:
         return Response(content="Login First", media_type="text/plain")
 
-    await db.execute("SELECT * FROM userdetails WHERE username=?", (uname,))
-    f = await db.fetchone()
+    f = await db.query_one("SELECT * FROM userdetails WHERE username=?", (uname,))
     if f["role"] == "admin":
-        await db.execute("SELECT * FROM eventreq")
-        pe = [dict(row) for row in await db.fetchall()]
-
-        categories = {}
-        with open("events.json", "r") as f:
-            categories = json.load(f)
-
-        return templates.TemplateResponse(request, "pendingevents.html", {"pendingevents": pe, "categories": categories})
+        limit = max(1, min(limit, MAX_BULK))
+        rows = await db.query_all("SELECT * FROM eventreq WHERE eventid>? ORDER BY eventid LIMIT ?", (after, limit + 1))
+        total = await db.query_one("SELECT COUNT(*) AS count FROM eventreq")
+        pe = [dict(row) for row in rows[:limit]]
+        return templates.TemplateResponse(request, "pendingevents.html", {
+            "pendingevents": pe,
+            "categories": event_categories(),
+            "total": total["count"],
+            "after": after,
+            "next_after": pe[-1]["eventid"] if len(rows) > limit else None,
+        })
     else:
         return RedirectResponse(url="/", status_code=303)
 
 @app.get("/deleteevent/{eventid}")
 async def deleteevent(request: Request, eventid: int, db: AsyncDB = Depends(get_db)):
-    loop = asyncio.get_event_loop()
-    res = await loop.run_in_executor(
-        None,
-        lambda: delete_event_mod.delete_eventfromid(db._c, eventid, request.session)
-    )
-    # Invalidate campaigns cache on delete
-    _campaigns_cache["ts"] = 0
+    res = await db_executor.run(delete_event_mod.delete_eventfromid, db._c, eventid, request.session)
     if res == "REDIRECT_HOME":
+        invalidate_event_translations(eventid)
         return RedirectResponse(url="/", status_code=303)
     return Response(content=res, media_type="text/plain")
 
@@ -863,28 +1196,12 @@ async def save_draft(request: Request):
 async def decline_event(request: Request, eventid: int, reason: str, db: AsyncDB = Depends(get_db)):
     u = request.session.get("username")
     if u:
-        await db.execute("SELECT * FROM userdetails WHERE username=?", (u,))
-        f = await db.fetchone()
+        f = await db.query_one("SELECT * FROM userdetails WHERE username=?", (u,))
         if f["role"] == "admin":
-            await db.execute("SELECT * FROM eventreq WHERE eventid=?", (eventid,))
-            email_row = await db.fetchone()
-
-            await db.execute("DELETE FROM eventreq WHERE eventid=?", (eventid,))
-
-            await db.execute("SELECT * FROM sqlite_sequence WHERE name=?", ("eventreq",))
-            seq = await db.fetchone()
-            await db.execute(
-                "UPDATE sqlite_sequence SET seq=? WHERE name=?",
-                (seq["seq"], "eventdetail")
-            )
+            # Removal and mail commit together, as for bulk declines
+            await db_executor.run(decline_requests, db._c, [eventid], reason, u)
 
-            details = detailsformat(dict(email_row))
-            sendmail(email_row['email'], "Event Declined",
-                     f"We sorry to inform to you that your event was declined for following reason:\n{reason}.\n\nEvent Details:\n\n{details}\n\nThank You!")
-            sendlog(f"#EventDecline \nEvent Declined by {u}\nReason: {reason}.\nEvent Details:\n\n{details}")
-
-    await db.execute("SELECT eventid FROM eventreq")
-    remaining = await db.fetchone()
+    remaining = await db.query_one("SELECT eventid FROM eventreq")
     if remaining:
         return RedirectResponse(url="/#pending", status_code=303)
     else:
@@ -908,16 +1225,56 @@ async def dummyevent(request: Request):
     request.session["endtime"] = f"{random.randint(10, 12)}:{random.randint(10, 59)}"
     return RedirectResponse(url="/#add", status_code=303)
 
+# --- Calendar Feed ---
+# FullCalendar asks for the visible range only; responses are cached per
+# (index version, range) and revalidated with ETag / If-None-Match.
+CALENDAR_MAX_DAYS = 400
+calendar_feed_cache = TTLCache(max_entries=256, ttl=300)
+
+def calendar_projection(e):
+    return {
+        "id": e["eventid"],
+        "title": e["eventname"],
+        "start": e["eventstartdate"] + (f"T{e['eventstarttime']}" if e["eventstarttime"] else ""),
+        "end": e["eventenddate"] + (f"T{e['eventendtime']}" if e["eventendtime"] else ""),
+        "location": e["location"],
+        "category": e["category"],
+    }
+
+@app.get("/calendar/events")
+async def calendar_events(request: Request, start: str, end: str):
+    """Events overlapping FullCalendar's [start, end) window, as a compact JSON feed."""
+    try:
+        start_date = datetime.date.fromisoformat(start[:10])
+        end_date = datetime.date.fromisoformat(end[:10])
+    except ValueError:
+        return JSONResponse(content={"error": "start and end must be ISO dates"}, status_code=400)
+    if not 0 < (end_date - start_date).days <= CALENDAR_MAX_DAYS:
+        return JSONResponse(content={"error": f"range must be 1 to {CALENDAR_MAX_DAYS} days"}, status_code=400)
+
+    events = await fresh_event_index()
+    key = (events.version, start_date, end_date)
+    cached = calendar_feed_cache.get(key)
+    if cached is None:
+        body = json.dumps([calendar_projection(e) for e in events.between(start_date.isoformat(), end_date.isoformat())],
+                          separators=(",", ":")).encode()
+        cached = (f'"{hashlib.sha1(body).hexdigest()}"', body)
+        calendar_feed_cache.set(key, cached)
+    etag, body = cached
+
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/api")
 async def api(request: Request, db: AsyncDB = Depends(get_db)):
-    await db.execute("SELECT * FROM eventdetail")
-    events = [dict(row) for row in await db.fetchall()]
+    events = (await fresh_event_index(db)).all()
     user = dict(request.session)
     user_details = "No user logged in"
     if user.get("username"):
-        await db.execute("SELECT * FROM userdetails WHERE username=?", (user["username"],))
-        ud = await db.fetchone()
-        user_details = dict(ud) if ud else {}
+        ud = await db.query_one(USER_DETAILS_QUERY, (user["username"],))
+        user_details = userdetails_dict(ud) if ud else {}
     toreturn = {
         "active events": events,
         "current session including draft add event values": user,
@@ -925,113 +1282,278 @@ async def api(request: Request, db: AsyncDB = Depends(get_db)):
     }
     return JSONResponse(content=toreturn)
 
+@app.get("/metrics")
+async def metrics():
+    return JSONResponse(content={
+        "db_pool": db_pool.stats(),
+        "db_executor": db_executor.stats(),
+        "fragment_cache": fragment_cache.stats(),
+        "translations": translation_service.stats(),
+        "event_translation_cache": event_translation_cache.stats(),
+        "event_index": event_index.stats(),
+        "notifications": notifier.stats(),
+        "socket_rooms": {  # this worker's sockets only
+            "rooms": len(room_subscribers),
+            "subscriptions": sum(room_subscribers.values()),
+            "subscribers": dict(room_subscribers),
+        },
+        "active_threads": threading.active_count(),
+    })
+
+async def is_admin(request: Request, db: AsyncDB):
+    uname = request.session.get("username")
+    if not uname:
+        return False
+    row = await db.query_one("SELECT role FROM userdetails WHERE username=?", (uname,))
+    return bool(row) and row["role"] == "admin"
+
+@app.get("/admin/outbox")
+async def admin_outbox(request: Request, limit: int = 50, db: AsyncDB = Depends(get_db)):
+    """Pending and failed event mails, for admins."""
+    if not await is_admin(request, db):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=403)
+    summary = await db_executor.run(outbox_summary, db._c, max(1, min(limit, 500)))
+    return JSONResponse(content=summary)
+
+@app.post("/admin/outbox/{mail_id}/retry")
+async def admin_outbox_retry(request: Request, mail_id: int, db: AsyncDB = Depends(get_db)):
+    if not await is_admin(request, db):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=403)
+    await db_executor.run(retry_mail, db._c, mail_id)
+    return JSONResponse(content={"retried": mail_id})
+
+async def bulk_ids(request: Request):
+    """Request ids from a {"eventids": [...]} body, and the body; ValueError if unusable."""
+    try:
+        body = await request.json()
+        ids = [int(x) for x in body.get("eventids", [])]
+    except Exception:
+        raise ValueError("Expected {\"eventids\": [...]}") from None
+    if not ids:
+        raise ValueError("No event ids given")
+    if len(ids) > MAX_BULK:
+        raise ValueError(f"At most {MAX_BULK} events at a time")
+    return ids, body
+
+@app.post("/admin/pending/approve")
+async def admin_bulk_approve(request: Request, db: AsyncDB = Depends(get_db)):
+    """Approves many event requests in one transaction."""
+    if not await is_admin(request, db):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=403)
+    try:
+        ids, _ = await bulk_ids(request)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    result = await db_executor.run(approve_requests, db._c, ids)
+    return JSONResponse(content=result)
+
+@app.post("/admin/pending/decline")
+async def admin_bulk_decline(request: Request, db: AsyncDB = Depends(get_db)):
+    """Declines many event requests with one reason, in one transaction."""
+    if not await is_admin(request, db):
+        return JSONResponse(content={"error": "Unauthorized"}, status_code=403)
+    try:
+        ids, body = await bulk_ids(request)
+    except ValueError as e:
+        return JSONResponse(content={"error": str(e)}, status_code=400)
+    reason = str(body.get("reason") or "").strip()
+    if not reason:
+        return JSONResponse(content={"error": "A reason is required"}, status_code=400)
+    result = await db_executor.run(decline_requests, db._c, ids, reason, request.session.get("username"))
+    return JSONResponse(content=result)
+
 @app.get("/checkeventloop")
 def checkeventloop():
+    """Manual sweep of everything already ended; the expiry scheduler normally does this without polling."""
     db, c = sync_db()
     try:
-        c.execute("SELECT * FROM eventdetail")
-        ch = c.fetchall()
-        hour24 = datetime.timedelta(hours=24)
-
-        for x in ch:
-            try:
-                etime = datetime.datetime.strptime(
-                    f"{x['eventenddate']} {x['eventendtime']}", "%Y-%m-%d %H:%M"
-                ).replace(tzinfo=ist)
-
-                # etime = etime + hour24
-
-                if etime <= datetime.datetime.now(ist):
-                    print(f"Deleting event {x['eventid']}")
-                    del_event(c, x["eventid"])
-                    details = detailsformat(dict(x))
-                    sendmail(x["email"], "Event Ended",
-                             f"Hey there your event was ended, so it has been deleted!\n\nEvent Details:\n\n{details}\n\nThank You!")
-                    sendlog(f"#EventEnd \nEvent Ended at {etime.strftime('%Y-%m-%d %H:%M:%S')}.\nEvent Details:\n\n{details}")
-                    # Invalidate campaigns cache
-                    _campaigns_cache["ts"] = 0
-            except Exception as e:
-                sendlog(f"Date parse error for event {x['eventid']}: {e}")
-
-        return Response(content="<h1>CHECK EVENT LOOP COMPLETED</h1>", media_type="text/html")
+        ended = expire_events(c, int(time.time()))
     except Exception as e:
+        close_db(db, failed=True)
         text = f"Check event loop error: {e}"
         sendlog(text)
         return Response(content=text, media_type="text/plain")
-    finally:
-        close_db(db)
+    close_db(db)
+    notify_ended(ended)
+    return Response(content="<h1>CHECK EVENT LOOP COMPLETED</h1>", media_type="text/html")
 
 @app.get("/download_ics/{eventid}")
-async def download_ics(eventid: int, db: AsyncDB = Depends(get_db)):
-    await db.execute("SELECT * FROM eventdetail WHERE eventid=?", (eventid,))
-    event = await db.fetchone()
+async def download_ics(request: Request, eventid: int):
+    events = await fresh_event_index()
+    event, stamp = events.get(eventid), events.stamp(eventid)
+    if event is None:
+        async with open_db() as db:
+            event = await db.query_one("SELECT * FROM eventdetail WHERE eventid=?", (eventid,))
     if not event:
         raise HTTPException(status_code=404, detail="Event not found")
 
-    try:
-        start_dt = f"{event['eventstartdate'].replace('-', '')}T{event['starttime'].replace(':', '')}00"
-        end_dt = f"{event['enddate'].replace('-', '')}T{event['endtime'].replace(':', '')}00"
-    except Exception:
-        start_dt = datetime.datetime.now().strftime("%Y%m%dT%H%M%S")
-        end_dt = start_dt
-
-    ics_content = f"""BEGIN:VCALENDAR
-VERSION:2.0
-PRODID:-//SahyogSutra//Events//EN
-BEGIN:VEVENT
-UID:SahyogSutra-{eventid}
-DTSTAMP:{datetime.datetime.now().strftime('%Y%m%dT%H%M%S')}
-DTSTART:{start_dt}
-DTEND:{end_dt}
-SUMMARY:{event['eventname']}
-DESCRIPTION:{event['description']}
-LOCATION:{event['location']}
-END:VEVENT
-END:VCALENDAR"""
+    headers = {"Content-Disposition": f"attachment; filename=event_{eventid}.ics"}
+    if stamp:
+        headers.update(validator_headers(f'"{stamp[0]}"', stamp[1], private=False))
+        if is_not_modified(request, headers["ETag"], stamp[1]):
+            return Response(status_code=304, headers=headers)
+
+    # DTSTAMP is the event's last change, so the same version always has the same bytes
+    dtstamp = datetime.datetime.fromtimestamp(stamp[1] if stamp else time.time(), datetime.timezone.utc)
+    ics_content = "".join(calendar_chunks([event], lambda e: dtstamp))
 
     return Response(
         content=ics_content,
         media_type="text/calendar",
-        headers={"Content-Disposition": f"attachment; filename=event_{eventid}.ics"}
+        headers=headers
     )
 
+# --- Calendar Subscriptions ---
+# Whole ICS feeds for calendar apps, built from the event index. Bodies are
+# cached per feed and listing tag, so hourly polling never reaches the DB and
+# any add, delete or like starts a new entry.
+ics_feed_cache = TTLCache(max_entries=512, ttl=3600)
+
+def calendar_token(username):
+    """Secret for a user's liked-events feed URL, which calendar apps fetch without a session."""
+    return hmac.new(SECRET_KEY.encode(), f"calendar:{username}".encode(), hashlib.sha256).hexdigest()[:32]
+
+async def ics_feed(request: Request, feed, name, rows_for):
+    events = await fresh_event_index()
+    tag, modified = events.listing_stamp()
+    key = (*feed, tag)
+    headers = {
+        **validator_headers(f'"{hashlib.sha1(repr(key).encode()).hexdigest()}"', modified, private=False),
+        "Content-Disposition": f'inline; filename="{feed[0]}.ics"',
+    }
+    if is_not_modified(request, headers["ETag"], modified):
+        return Response(status_code=304, headers=headers)
+    cached = ics_feed_cache.get(key)
+    if cached is not None:
+        return Response(content=cached, media_type="text/calendar; charset=utf-8", headers=headers)
+
+    rows = await rows_for(events)
+    base_url = str(request.base_url)
+
+    def dtstamp(e):
+        stamp = events.stamp(e["eventid"])
+        return datetime.datetime.fromtimestamp(stamp[1] if stamp else modified, datetime.timezone.utc)
+
+    def generate():
+        parts = []
+        for chunk in calendar_chunks(rows, dtstamp, name, url_for=lambda e: f"{base_url}event/{e['eventid']}"):
+            data = chunk.encode("utf-8")
+            parts.append(data)
+            yield data
+        ics_feed_cache.set(key, b"".join(parts))
+
+    return StreamingResponse(generate(), media_type="text/calendar; charset=utf-8", headers=headers)
+
+@app.get("/calendar.ics")
+async def calendar_ics(request: Request, category: Optional[str] = None):
+    async def rows_for(events):
+        return events.query(categories=[category] if category else None)[0]
+    return await ics_feed(request, ("events", category), f"SahyogSutra - {category or 'All Events'}", rows_for)
+
+@app.get("/calendar/owned/{username}.ics")
+async def owned_calendar_ics(request: Request, username: str):
+    async def rows_for(events):
+        return events.query(owner=username)[0]
+    return await ics_feed(request, ("owned", username), f"SahyogSutra - Events by {username}", rows_for)
+
+@app.get("/calendar/liked/{username}.ics")
+async def liked_calendar_ics(request: Request, username: str, token: str = ""):
+    if not hmac.compare_digest(token, calendar_token(username)):
+        return Response(content="Invalid calendar token", status_code=403, media_type="text/plain")
+
+    async def rows_for(events):
+        liked = await run_query("SELECT eventid FROM event_likes WHERE username=? ORDER BY eventid", (username,))
+        return [e for e in (events.get(r["eventid"]) for r in liked) if e is not None]
+    return await ics_feed(request, ("liked", username), f"SahyogSutra - Liked by {username}", rows_for)
+
+@app.get("/calendar/subscribe")
+async def calendar_subscribe(request: Request):
+    """Subscription URLs for the logged-in user's calendar apps."""
+    uname = request.session.get("username")
+    if not uname:
+        return Response(content="Login First", media_type="text/plain")
+    base_url = str(request.base_url)
+    return JSONResponse(content={
+        "all": f"{base_url}calendar.ics",
+        "owned": f"{base_url}calendar/owned/{quote(uname)}.ics",
+        "liked": f"{base_url}calendar/liked/{quote(uname)}.ics?token={calendar_token(uname)}",
+    })
+
+EXPORT_BATCH = int(os.environ.get("EXPORT_BATCH", 500))
+
 @app.get("/export_data")
-async def export_data(request: Request, db: AsyncDB = Depends(get_db)):
+async def export_data(request: Request, format: str = "csv", include: Optional[str] = None):
+    """
+    The logged-in user's data, streamed page by page: profile, created, liked
+    (active and ended), ended events and chat messages. `include` picks a
+    comma list of those scopes, `format` is csv or ndjson.
+    """
     username = request.session.get("username")
     if not username:
         raise HTTPException(status_code=401, detail="Please login first")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    try:
+        sections = parse_export_scopes(include)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    await db.execute("SELECT * FROM userdetails WHERE username=?", (username,))
-    ud = await db.fetchone()
-    if not ud:
+    if not await run_query("SELECT 1 FROM userdetails WHERE username=?", (username,), fetchmode="one"):
         raise HTTPException(status_code=404, detail="User not found")
 
-    output = io.StringIO()
-    writer = csv.writer(output)
-
-    writer.writerow(["--- USER PROFILE ---"])
-    writer.writerow(["Name", "Username", "Email", "Role", "Events IDs"])
-    writer.writerow([ud["name"], ud["username"], ud["email"], ud["role"], ud["events"]])
-
-    writer.writerow([])
-    writer.writerow(["--- CREATED EVENTS ---"])
-    if ud["events"]:
-        event_ids = ud["events"].split(",")
-        writer.writerow(["Event ID", "Name", "Location", "Category", "Date", "Description"])
-        for eid in event_ids:
-            await db.execute("SELECT * FROM eventdetail WHERE eventid=?", (eid,))
-            ev = await db.fetchone()
-            if ev:
-                writer.writerow([ev["eventid"], ev["eventname"], ev["location"], ev["category"], ev["eventstartdate"], ev["description"]])
-
-    output.seek(0)
+    media_type, ext = EXPORT_FORMATS[format]
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": f"attachment; filename=SahyogSutra_data_{username}.csv"}
+        export_chunks(run_query, username, sections, format, batch=EXPORT_BATCH),
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename=SahyogSutra_data_{username}.{ext}"}
     )
 
 # --- SocketIO Events ---
+# Chat and like updates go to per-event rooms ("chat:<id>", "event:<id>")
+# that pages join explicitly, instead of being broadcast to every socket.
+
+MAX_WATCHED_EVENTS = 500
+room_subscribers: dict[str, int] = {}  # {room: sockets in it on this worker}
+_sid_rooms: dict[str, set] = {}  # {sid: rooms it joined}
+
+async def _set_rooms(sid, prefix, rooms):
+    """Make `rooms` the exact set of `prefix` rooms this socket is in."""
+    joined = _sid_rooms.setdefault(sid, set())
+    current = {r for r in joined if r.startswith(prefix)}
+    for room in current - rooms:
+        await sio.leave_room(sid, room)
+        joined.discard(room)
+        room_subscribers[room] -= 1
+        if not room_subscribers[room]:
+            del room_subscribers[room]
+    for room in rooms - current:
+        await sio.enter_room(sid, room)
+        joined.add(room)
+        room_subscribers[room] = room_subscribers.get(room, 0) + 1
+
+def _event_ids(values):
+    ids = set()
+    for v in values[:MAX_WATCHED_EVENTS]:
+        try:
+            ids.add(int(v))
+        except (TypeError, ValueError):
+            pass
+    return ids
+
+@sio.on("watch_events")
+async def watch_events(sid, data):
+    await _set_rooms(sid, "event:", {f"event:{x}" for x in _event_ids(data.get("eventids", []))})
+
+@sio.on("join_chat")
+async def join_chat(sid, data):
+    await _set_rooms(sid, "chat:", {f"chat:{x}" for x in _event_ids([data.get("eventid")])})
+
+@sio.event
+async def disconnect(sid, *args):
+    for room in _sid_rooms.pop(sid, ()):
+        room_subscribers[room] -= 1
+        if not room_subscribers[room]:
+            del room_subscribers[room]
 
 @sio.on("add_grp_msg")
 async def add_group_msg(sid, data):
@@ -1040,31 +1562,21 @@ async def add_group_msg(sid, data):
     eventid = data["eventid"]
     msg_time = datetime.datetime.now(ist).strftime("%Y-%m-%d %H:%M:%S")
 
-    loop = asyncio.get_event_loop()
+    def _insert(c):
+        c.execute(
+            "INSERT INTO chat_messages(eventid, username, message, created_at) VALUES (?, ?, ?, ?)",
+            (eventid, username, message, msg_time)
+        )
+        return c.lastrowid
 
-    def _insert():
-        db, c = sync_db()
-        try:
-            find = c.execute("SELECT * FROM messages2 WHERE eventid=(?)", (eventid,)).fetchone()
-            if not find:
-                c.execute("INSERT INTO messages2(eventid, msgs) VALUES(?, ?)", (eventid, "[]"))
-                find = c.execute("SELECT * FROM messages2 WHERE eventid=(?)", (eventid,)).fetchone()
-            msg = find["msgs"]
-            msg = ast.literal_eval(msg)
-            updated = (username, message, msg_time)
-            msg.append(updated)
-            c.execute("UPDATE messages2 SET msgs=(?) WHERE eventid=(?)", (str(msg), eventid))
-            db.commit()
-        finally:
-            db.close()
-
-    await loop.run_in_executor(None, _insert)
+    msg_id = await run_db(_insert)
     await sio.emit("new_message", {
+        "id": msg_id,
         "eventid": eventid,
         "username": username,
         "message": message,
         "time": msg_time
-    })
+    }, room=f"chat:{eventid}")
 
 @sio.on("addeventlike")
 async def add_like(sid, data):
@@ -1072,37 +1584,36 @@ async def add_like(sid, data):
     byuser = data["byuser"]
     like_type = data["type"]
 
-    loop = asyncio.get_event_loop()
-
-    def _update_like():
-        db, c = sync_db()
-        try:
-            ud = c.execute("SELECT * FROM userdetails WHERE username=?", (byuser,)).fetchone()
-            liked_events = ud["likes"].split(",") if ud["likes"] else []
-
-            if like_type == "add":
-                if str(eventid) not in liked_events:
-                    liked_events.append(str(eventid))
-                    c.execute("UPDATE eventdetail SET likes = likes + 1 WHERE eventid=?", (eventid,))
-            else:
-                if str(eventid) in liked_events:
-                    liked_events.remove(str(eventid))
-                    c.execute("UPDATE eventdetail SET likes = likes - 1 WHERE eventid=?", (eventid,))
-
-            new_likes_str = ",".join(liked_events)
-            c.execute("UPDATE userdetails SET likes=? WHERE username=?", (new_likes_str, byuser))
-            new_likes_val = c.execute("SELECT likes FROM eventdetail WHERE eventid=?", (eventid,)).fetchone()["likes"]
-            db.commit()
-            print(f"Like update: ID = {eventid}, Likes: {new_likes_val}, Type = {like_type}")
-            return new_likes_val
-        finally:
-            db.close()
-
-    # Run DB update in executor thread and capture the returned like count
-    new_likes = await loop.run_in_executor(None, _update_like)
+    def _update_like(c):
+        # Idempotent: repeating an add/remove leaves the same row set and count
+        # Only live events take likes; ended or unknown ids would leave orphan rows
+        if like_type == "add":
+            c.execute(
+                """INSERT OR IGNORE INTO event_likes(username, eventid) SELECT ?, ?
+                   WHERE EXISTS (SELECT 1 FROM userdetails WHERE username=?)
+                     AND EXISTS (SELECT 1 FROM eventdetail WHERE eventid=?)""",
+                (byuser, eventid, byuser, eventid)
+            )
+        else:
+            c.execute("DELETE FROM event_likes WHERE username=? AND eventid=?", (byuser, eventid))
+        c.execute(
+            "UPDATE eventdetail SET likes = (SELECT COUNT(*) FROM event_likes WHERE eventid=?) WHERE eventid=?",
+            (eventid, eventid)
+        )
+        row = c.execute("SELECT likes FROM eventdetail WHERE eventid=?", (eventid,)).fetchone()
+        if row is None:
+            return None
+        print(f"Like update: ID = {eventid}, Likes: {row['likes']}, Type = {like_type}")
+        return row["likes"]
+
+    # Run DB update on the DB executor and capture the returned like count
+    new_likes = await run_db(_update_like)
+    if new_likes is None:
+        return {"error": "Event not found"}  # the ack of the emit
+    event_index.set_likes(int(eventid), new_likes)
 
     # Emit using the value returned from the executor
-    await sio.emit("update_like", {"eventid": eventid, "likes": new_likes})
+    await sio.emit("update_like", {"eventid": eventid, "likes": new_likes}, room=f"event:{eventid}")
 
 
 # --- Final ASGI App: Single SocketIO mount ---
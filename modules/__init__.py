@@ -1,6 +1,22 @@
-from .mail_model import sendmail, sendmailthread
+from .notify import notifier
+from .mail_model import sendmail
 from .sendlog_model import sendlog, sendlogthread
-from .delete_event import del_event, delete_eventfromid
+from .delete_event import del_event, delete_eventfromid, expire_events
 from .detailformat import detailsformat
 from .add_event import addevent, addeventrequest
 from .misc import email_send_message
+from .db_pool import ConnectionPool, PoolTimeout, transaction
+from .db_executor import BoundedExecutor, ExecutorSaturated
+from .migrations import migrate
+from .expiry import expiry_scheduler, end_timestamp, try_acquire_lease, release_lease
+from .outbox import enqueue_mail, enqueue_mails, claim_mail, deliver, record_delivery, outbox_summary, retry_mail, outbox_wakeup
+from .translations import translation_store, normalize_text, TranslationStore
+from .fragment_cache import FragmentCache
+from .translation_service import TranslationService, make_backend
+from .ttl_cache import TTLCache
+from .translation_files import TranslationFiles
+from .event_index import event_index, EventIndex, SORT_FIELDS
+from .search_index import SearchIndex, highlight
+from .ics import calendar_chunks
+from .export import export_chunks, parse_export_scopes, EXPORT_FORMATS
+from .moderation import approve_requests, decline_requests, MAX_BULK
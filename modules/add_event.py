@@ -1,6 +1,15 @@
-from . import sendlog, sendmail, detailsformat
-
-def addevent(c, form_data: dict, owner_username: str):
+from . import sendlog, detailsformat
+from .expiry import expiry_scheduler, end_timestamp
+from .outbox import enqueue_mail, outbox_wakeup
+from .db_pool import transaction
+from .event_index import event_index
+
+def addevent(c, form_data: dict, owner_username: str, request_owner: str = None):
+    """
+    Publishes an event. The insert, its owner row and the "Event Approved" mail
+    commit together. With `request_owner` (an admin approving a request) the
+    matching eventreq row is removed in the same transaction.
+    """
     field = ["eventname", "email", "eventstarttime", "eventendtime", "eventstartdate", "eventenddate", "location", "category", "description", "username"]
     event_values = []
     for f in field:
@@ -9,47 +18,47 @@ def addevent(c, form_data: dict, owner_username: str):
         else:
             event_values.append(form_data.get(f))
 
-    check = c.execute("SELECT * FROM eventdetail WHERE eventname=?", (event_values[0],))
-    fetchall = check.fetchall()
-    for ab in fetchall:
-        if all(ab[x] == y for x, y in zip(field, event_values)):
-            return "Event Already Exists"
-
-    tuple_all = ", ".join(field)
-    vals = ", ".join(["?"] * len(event_values))
+    ends_at = end_timestamp(form_data.get("eventenddate"), form_data.get("eventendtime"))
+    tuple_all = ", ".join(field + ["ends_at"])
+    vals = ", ".join(["?"] * (len(event_values) + 1))
 
     try:
-        c.execute(f"INSERT INTO eventdetail({tuple_all}) VALUES ({vals})", tuple(event_values))
+        with transaction(c):
+            if request_owner:
+                c.execute("DELETE FROM eventreq WHERE eventname=? AND username=?", (event_values[0], request_owner))
 
-        lastid = c.execute("SELECT eventid FROM eventdetail ORDER BY eventid DESC LIMIT 1").fetchone()
+            fetchall = c.execute("SELECT * FROM eventdetail WHERE eventname=?", (event_values[0],)).fetchall()
+            for ab in fetchall:
+                if all(ab[x] == y for x, y in zip(field, event_values)):
+                    return "Event Already Exists"
 
-        # Delete matched request by eventid (accurate post-insert)
-        c.execute("DELETE FROM eventreq WHERE eventid=?", (lastid["eventid"],))
+            c.execute(f"INSERT INTO eventdetail({tuple_all}) VALUES ({vals})", tuple(event_values) + (ends_at,))
 
-        # Update userdetails 'events' column
-        uud = c.execute("SELECT events FROM userdetails WHERE username=?", (owner_username,)).fetchone()
-        if not uud or not uud["events"]:
-            fe = []
-        else:
-            fe = uud["events"].split(",")
+            lastid = c.execute("SELECT eventid FROM eventdetail ORDER BY eventid DESC LIMIT 1").fetchone()
 
-        fe.append(str(lastid["eventid"]))
-        joint = ",".join(fe)
-        c.execute("UPDATE userdetails SET events=? WHERE username=?", (joint, owner_username))
+            # Delete matched request by eventid (accurate post-insert)
+            c.execute("DELETE FROM eventreq WHERE eventid=?", (lastid["eventid"],))
 
-        # Fetch details for email
-        eventdetails = c.execute("SELECT * FROM eventdetail WHERE eventid=?", (lastid["eventid"],)).fetchone()
-        details = detailsformat(eventdetails)
+            # Record ownership
+            c.execute("INSERT OR IGNORE INTO event_owners(eventid, username) VALUES (?, ?)", (lastid["eventid"], owner_username))
 
-        sendmail(event_values[1], "Event Approved", f'Congragulations\n\nYour Event is approved and now visible on Campaigns Page.\n\nEvent Details:\n\n{details}\n\nThank You!')
+            # Fetch details for email
+            eventdetails = c.execute("SELECT * FROM eventdetail WHERE eventid=?", (lastid["eventid"],)).fetchone()
+            details = detailsformat(eventdetails)
 
-        sendlog(f"#EventAdd \nNew Event Added:\n{details}")
-        return "Event added!"
+            enqueue_mail(c, f"event-approved:{lastid['eventid']}", event_values[1], "Event Approved", f'Congragulations\n\nYour Event is approved and now visible on Campaigns Page.\n\nEvent Details:\n\n{details}\n\nThank You!')
 
     except Exception as e:
         print(f"Error adding event: {e}")
         return f"Error adding event: {str(e)}"
 
+    # The outbox and in-memory copies only learn of the event once it is committed
+    outbox_wakeup.set()
+    expiry_scheduler.add(lastid["eventid"], ends_at)
+    event_index.upsert(eventdetails)
+    sendlog(f"#EventAdd \nNew Event Added:\n{details}")
+    return "Event added!"
+
 
 def addeventrequest(c, form_data: dict, session: dict):
     uuname, uemail = session.get("username"), session.get("email")
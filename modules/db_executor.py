@@ -0,0 +1,63 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+
+class ExecutorSaturated(Exception):
+    pass
+
+
+class BoundedExecutor:
+    """
+    Thread pool reserved for blocking DB work.
+    At most max_workers jobs run and max_queue more may wait; anything beyond
+    that is rejected straight away with ExecutorSaturated instead of queueing.
+    """
+    def __init__(self, max_workers=10, max_queue=100, thread_name_prefix="db"):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=thread_name_prefix)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+
+    def saturated(self):
+        with self._lock:
+            return self._pending >= self.max_workers + self.max_queue
+
+    def submit(self, fn, *args, **kwargs):
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise ExecutorSaturated(f"DB executor saturated ({self._pending} jobs pending)")
+            self._pending += 1
+        try:
+            future = self._executor.submit(fn, *args, **kwargs)
+        except Exception:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, _future):
+        with self._lock:
+            self._pending -= 1
+            self._completed += 1
+
+    async def run(self, fn, *args, **kwargs):
+        return await asyncio.wrap_future(self.submit(fn, *args, **kwargs))
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "pending": self._pending,
+                "queued": max(0, self._pending - self.max_workers),
+                "completed": self._completed,
+                "rejected": self._rejected,
+            }
@@ -0,0 +1,176 @@
+import collections
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+@contextmanager
+def transaction(c):
+    """
+    BEGIN IMMEDIATE ... COMMIT on cursor `c`, ROLLBACK if the block raises.
+    IMMEDIATE takes the write lock up front, so the transaction cannot fail
+    half way with "database is locked" when it first writes.
+    """
+    c.execute("BEGIN IMMEDIATE")
+    try:
+        yield c
+    except BaseException:
+        c.execute("ROLLBACK")
+        raise
+    c.execute("COMMIT")
+
+
+class ConnectionPool:
+    """
+    Bounded pool of reusable DB connections.
+    Idle connections are handed out LIFO, health-checked if they sat unused
+    for a while and evicted once idle longer than max_idle seconds.
+    """
+    def __init__(self, connect, max_size=10, max_idle=300, acquire_timeout=10.0, check_after=30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self.acquire_timeout = acquire_timeout
+        self.check_after = check_after
+
+        self._cond = threading.Condition()
+        self._idle = collections.deque()  # (conn, last_used), oldest on the left
+        self._size = 0
+        self._in_use = 0
+        self._closed = False
+
+        self._created = 0
+        self._evicted = 0
+        self._failed_checks = 0
+        self._waits = 0
+        self._timeouts = 0
+
+    def _evict_idle_locked(self):
+        now = time.monotonic()
+        while self._idle and now - self._idle[0][1] > self.max_idle:
+            conn, _ = self._idle.popleft()
+            self._size -= 1
+            self._evicted += 1
+            self._close_quietly(conn)
+
+    @staticmethod
+    def _close_quietly(conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            if hasattr(conn, "is_connected") and not conn.is_connected():
+                return False
+            conn.cursor().execute("SELECT 1").fetchone()
+            return True
+        except Exception:
+            return False
+
+    def acquire(self, timeout=None):
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise PoolTimeout("Connection pool is closed")
+                self._evict_idle_locked()
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    self._in_use += 1
+                    break
+                if self._size < self.max_size:
+                    conn, last_used = None, None
+                    self._size += 1
+                    self._in_use += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    raise PoolTimeout(f"No DB connection available after {timeout}s")
+                if not waited:
+                    self._waits += 1
+                    waited = True
+                self._cond.wait(remaining)
+
+        if conn is not None and time.monotonic() - last_used > self.check_after:
+            if not self._healthy(conn):
+                self._failed_checks += 1
+                self._close_quietly(conn)
+                conn = None
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._in_use -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._created += 1
+        return conn
+
+    def release(self, conn, discard=False, rollback=False):
+        if rollback and not discard:
+            discard = not self._rollback(conn)
+        with self._cond:
+            self._in_use -= 1
+            if discard or self._closed:
+                self._size -= 1
+                self._close_quietly(conn)
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        except Exception:
+            self.release(conn, rollback=True)
+            raise
+        else:
+            self.release(conn)
+
+    @staticmethod
+    def _rollback(conn):
+        try:
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                conn, _ = self._idle.popleft()
+                self._size -= 1
+                self._close_quietly(conn)
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "size": self._size,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                "created": self._created,
+                "evicted": self._evicted,
+                "failed_health_checks": self._failed_checks,
+                "waits": self._waits,
+                "timeouts": self._timeouts,
+            }
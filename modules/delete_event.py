@@ -1,44 +1,58 @@
-from . import sendlog, sendmail
+from . import sendlog
 from .detailformat import detailsformat
+from .expiry import expiry_scheduler
+from .outbox import enqueue_mail, outbox_wakeup
+from .db_pool import transaction
+from .event_index import event_index
 
-def del_event(c, eventid):
-    try:
-        edetail = c.execute("SELECT * FROM eventdetail WHERE eventid=?", (eventid,)).fetchone()
-        if not edetail: return
+ENDED_COLUMNS = "`eventid`,`eventname`,`email`,`eventstarttime`,`eventendtime`,`eventstartdate`,`eventenddate`,`location`,`category`,`description`,`username`,`likes`"
 
-        details = c.execute("SELECT * FROM userdetails WHERE username=?", (edetail["username"],)).fetchone()
+def del_event(c, eventid):
+    """
+    Moves an event to endedevent; run it inside the caller's transaction, errors
+    propagate. Returns whether there was one, for the caller to drop it from
+    the event index and expiry scheduler once the transaction commits.
+    """
+    edetail = c.execute("SELECT * FROM eventdetail WHERE eventid=?", (eventid,)).fetchone()
+    if not edetail: return False
 
-        insert_in_ended_query = """INSERT INTO `endedevent` (`eventid`,`eventname`,`email`,`eventstarttime`,`eventendtime`,`eventstartdate`,`eventenddate`,`location`,`category`,`description`,`username`,`likes`)
-                   SELECT `eventid`,`eventname`,`email`,`eventstarttime`,`eventendtime`,`eventstartdate`,`eventenddate`,`location`,`category`,`description`,`username`,`likes` FROM `eventdetail` WHERE `eventid` = (?)"""
+    insert_in_ended_query = f"""INSERT INTO `endedevent` ({ENDED_COLUMNS})
+               SELECT {ENDED_COLUMNS} FROM `eventdetail` WHERE `eventid` = (?)"""
 
-        c.execute(insert_in_ended_query, (eventid,))
+    c.execute(insert_in_ended_query, (eventid,))
 
-        c.execute("DELETE FROM eventdetail where eventid=?", (eventid,))
-        c.execute("DELETE FROM messages where eventid=?", (eventid,))
+    c.execute("DELETE FROM eventdetail where eventid=?", (eventid,))
+    c.execute("DELETE FROM messages where eventid=?", (eventid,))
+    # event_likes rows are kept so liked history still resolves against endedevent
+    c.execute("DELETE FROM event_owners WHERE eventid=?", (eventid,))
+    return True
 
-        if details and details["events"]:
-            events = details["events"].split(",")
-            if str(eventid) in events:
-                events.remove(str(eventid))
-                new = ",".join(events)
-                if events == []:
-                    c.execute("UPDATE userdetails SET events=NULL WHERE username=?", (details["username"], ))
-                else:
-                    c.execute("UPDATE userdetails SET events=? WHERE username=?", (new, details["username"]))
 
-        if details and details["likes"]:
-            likes = details["likes"].split(",")
-            if str(eventid) in likes:
-                likes.remove(str(eventid))
-                newl = ",".join(likes)
-                if likes == []:
-                    c.execute("UPDATE userdetails SET likes=NULL WHERE username=?", (details["username"], ))
-                else:
-                    c.execute("UPDATE userdetails SET likes=? WHERE username=?", (newl, details["username"]))
+def expire_events(c, now):
+    """
+    Moves every event with ends_at <= now to endedevent using set-based
+    statements in one BEGIN IMMEDIATE transaction, queueing the owners'
+    "Event Ended" mails in the same transaction. The event index and expiry
+    scheduler drop the events after the commit. Returns the expired rows.
+    """
+    with transaction(c):
+        ended = [dict(r) for r in c.execute("SELECT * FROM eventdetail WHERE ends_at <= ?", (now,)).fetchall()]
+        if not ended:
+            return ended
 
-    except Exception as e:
-        sendlog(f"Error Deleting Event {eventid}: {e}")
-        print(f"Error Deleting Event {eventid}: {e}")
+        due = "SELECT eventid FROM eventdetail WHERE ends_at <= ?"
+        c.execute(f"INSERT INTO `endedevent` ({ENDED_COLUMNS}) SELECT {ENDED_COLUMNS} FROM `eventdetail` WHERE ends_at <= ?", (now,))
+        c.execute(f"DELETE FROM messages WHERE eventid IN ({due})", (now,))
+        c.execute(f"DELETE FROM event_owners WHERE eventid IN ({due})", (now,))
+        c.execute("DELETE FROM eventdetail WHERE ends_at <= ?", (now,))
+        for x in ended:
+            enqueue_mail(c, f"event-ended:{x['eventid']}", x["email"], "Event Ended",
+                         f"Hey there your event was ended, so it has been deleted!\n\nEvent Details:\n\n{detailsformat(x)}\n\nThank You!")
+    outbox_wakeup.set()
+    for x in ended:
+        expiry_scheduler.discard(x["eventid"])
+        event_index.discard(x["eventid"])
+    return ended
 
 
 def delete_eventfromid(c, eventid, session: dict):
@@ -56,14 +70,21 @@ def delete_eventfromid(c, eventid, session: dict):
     fe2 = c.fetchone()
 
     if fe["username"] == uname or (fe2 and fe2["role"]=="admin"):
+        details = detailsformat(fe)
         try:
-            del_event(c, eventid)
-            details = detailsformat(fe)
-            if extra:
-                sendmail(extra["email"], "Event Deleted", f"Hey {extra['name']}! Your event was deleted by {uname}.\n\nEvent Details:\n\n{details}\n\nThank You!")
-            sendlog(f"#EventDelete \nEvent Deleted by {uname}.\nEvent Details:\n\n{details}")
-            return "REDIRECT_HOME"
+            # The move and the owner's mail commit together
+            with transaction(c):
+                moved = del_event(c, eventid)
+                if extra:
+                    enqueue_mail(c, f"event-deleted:{eventid}", extra["email"], "Event Deleted", f"Hey {extra['name']}! Your event was deleted by {uname}.\n\nEvent Details:\n\n{details}\n\nThank You!")
         except Exception as e:
+            print(f"Error Deleting Event {eventid}: {e}")
             sendlog(f"Error Deleting Event {eventid}: {e}")
             return f"Error: {e}"
+        outbox_wakeup.set()
+        if moved:
+            expiry_scheduler.discard(eventid)
+            event_index.discard(eventid)
+        sendlog(f"#EventDelete \nEvent Deleted by {uname}.\nEvent Details:\n\n{details}")
+        return "REDIRECT_HOME"
     return "Unauthorized"
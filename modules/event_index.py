@@ -0,0 +1,325 @@
+import base64
+import bisect
+import hashlib
+import json
+import os
+import threading
+import time
+
+from .search_index import SearchIndex, tokenize
+
+
+# Fields the campaigns list can be sorted by; strings compare case-insensitively
+SORT_FIELDS = ("eventstartdate", "eventenddate", "eventname", "likes", "eventid", "location", "eventstarttime", "eventendtime")
+NUMERIC_FIELDS = ("likes", "eventid")
+
+
+def sort_value(row, field):
+    value = row[field]
+    if field in NUMERIC_FIELDS:
+        return value or 0
+    return (value or "").lower()
+
+
+def encode_cursor(key):
+    return base64.urlsafe_b64encode(json.dumps(key, separators=(",", ":")).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort):
+    """(sort value, eventid) from a page cursor; ValueError if it is not one for this sort."""
+    try:
+        value, eventid = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except Exception:
+        raise ValueError("Invalid cursor") from None
+    expected = int if sort in NUMERIC_FIELDS else str
+    if not isinstance(value, expected) or isinstance(value, bool) or not isinstance(eventid, int):
+        raise ValueError("Invalid cursor")
+    return value, eventid
+
+
+def row_tag(row):
+    """Content hash of an event row; the same on every worker and across reloads."""
+    return hashlib.sha1(repr(sorted(row.items())).encode()).hexdigest()[:20]
+
+
+class EventIndex:
+    """
+    In-memory copy of eventdetail, loaded once and then kept current by the
+    code paths that change it (addevent, approve_requests, delete_eventfromid,
+    expire_events, likes).
+    Keeps the rows by id, a (-likes, eventid) ordering for trending, the
+    organizer leaderboards, a full-text SearchIndex and a version stamp per
+    event (content tag, time it last changed) for conditional GETs. The
+    orderings used by query() are rebuilt lazily once per `version`.
+    Changes made by other workers are picked up by reloading every `resync`
+    seconds. Writes that land here while a reload's SELECT runs are replayed
+    on top of what it read, so a reload never brings back a deleted event or
+    drops a new one.
+    """
+    def __init__(self, resync=60):
+        self.resync = resync
+        self._lock = threading.Lock()
+        self._events = {}  # eventid -> row dict, in eventid order
+        self._by_likes = []  # sorted [(-likes, eventid)]
+        self._orderings = {}  # sort field -> (version, sorted [(value, eventid)])
+        self._organizers = {}  # username -> [events, likes]
+        self._leaders = {"events": [], "likes": []}  # sorted [(-total, username)]
+        self.search = SearchIndex()
+        self._stamps = {}  # eventid -> (tag, modified epoch)
+        self._listing = (None, None, 0.0)  # (version, tag, modified) over all events
+        self.version = 0
+        self.loaded_at = None
+        self._writes = 0  # generation, bumped by every upsert/discard/set_likes
+        self._loading = 0  # load_from calls whose SELECT is running
+        self._replay = []  # [(generation, write, args)] recorded while _loading
+
+    def _bump_locked(self):
+        self.version += 1
+        self._orderings.clear()
+
+    def load(self, rows):
+        self._load(rows)
+
+    def _load(self, rows, since=None):
+        with self._lock:
+            self._events = {r["eventid"]: dict(r) for r in sorted(rows, key=lambda r: r["eventid"])}
+            self._by_likes = sorted((-(r["likes"] or 0), eid) for eid, r in self._events.items())
+            self._organizers = {}
+            for r in self._events.values():
+                totals = self._organizers.setdefault(r["username"], [0, 0])
+                totals[0] += 1
+                totals[1] += r["likes"] or 0
+            self._leaders = {
+                by: sorted((-totals[i], username) for username, totals in self._organizers.items())
+                for i, by in enumerate(("events", "likes"))
+            }
+            self.search.load(self._events.values())
+            # Unchanged rows keep their stamp, so a resync does not invalidate pages
+            now, old = time.time(), self._stamps
+            self._stamps = {}
+            for eid, r in self._events.items():
+                tag = row_tag(r)
+                self._stamps[eid] = old[eid] if eid in old and old[eid][0] == tag else (tag, now)
+            if since is not None:
+                for generation, write, args in self._replay:
+                    if generation > since:
+                        write(*args)
+            self.loaded_at = time.monotonic()
+            self._bump_locked()
+
+    def load_from(self, c):
+        """Reloads from eventdetail on cursor `c`; returns the number of events."""
+        with self._lock:
+            self._loading += 1
+            since = self._writes
+        try:
+            self._load(c.execute("SELECT * FROM eventdetail").fetchall(), since)
+        finally:
+            with self._lock:
+                self._loading -= 1
+                if not self._loading:
+                    self._replay.clear()
+        return len(self._events)
+
+    def is_stale(self):
+        return self.loaded_at is None or time.monotonic() - self.loaded_at > self.resync
+
+    # --- Writes ---
+
+    def _drop_likes_locked(self, row):
+        key = (-(row["likes"] or 0), row["eventid"])
+        i = bisect.bisect_left(self._by_likes, key)
+        if i < len(self._by_likes) and self._by_likes[i] == key:
+            del self._by_likes[i]
+
+    def _credit_locked(self, username, events, likes):
+        """Moves an organizer's leaderboard entries after a change of (events, likes)."""
+        totals = self._organizers.get(username, [0, 0])
+        for i, by in enumerate(("events", "likes")):
+            leaders = self._leaders[by]
+            i_old = bisect.bisect_left(leaders, (-totals[i], username))
+            if i_old < len(leaders) and leaders[i_old] == (-totals[i], username):
+                del leaders[i_old]
+        totals = [totals[0] + events, totals[1] + likes]
+        if totals[0] <= 0:
+            self._organizers.pop(username, None)
+            return
+        self._organizers[username] = totals
+        for i, by in enumerate(("events", "likes")):
+            bisect.insort(self._leaders[by], (-totals[i], username))
+
+    def _record_locked(self, write, *args):
+        self._writes += 1
+        if self._loading:
+            self._replay.append((self._writes, write, args))
+
+    def upsert(self, row):
+        row = dict(row)
+        with self._lock:
+            self._upsert_locked(row)
+            self._record_locked(self._upsert_locked, row)
+            self._bump_locked()
+
+    def _upsert_locked(self, row):
+        eid = row["eventid"]
+        old = self._events.get(eid)
+        if old is not None:
+            self._drop_likes_locked(old)
+            self._credit_locked(old["username"], -1, -(old["likes"] or 0))
+        self._events[eid] = row
+        if old is None and len(self._events) > 1 and eid < max(self._events):
+            self._events = dict(sorted(self._events.items()))  # keep eventid order
+        bisect.insort(self._by_likes, (-(row["likes"] or 0), eid))
+        self._credit_locked(row["username"], 1, row["likes"] or 0)
+        self.search.upsert(row)
+        self._stamps[eid] = (row_tag(row), time.time())
+
+    def discard(self, eventid):
+        with self._lock:
+            self._record_locked(self._discard_locked, eventid)
+            if self._discard_locked(eventid):
+                self._bump_locked()
+
+    def _discard_locked(self, eventid):
+        row = self._events.pop(eventid, None)
+        if row is None:
+            return False
+        self._drop_likes_locked(row)
+        self._credit_locked(row["username"], -1, -(row["likes"] or 0))
+        self.search.discard(eventid)
+        self._stamps.pop(eventid, None)
+        return True
+
+    def set_likes(self, eventid, likes):
+        with self._lock:
+            self._record_locked(self._set_likes_locked, eventid, likes)
+            if self._set_likes_locked(eventid, likes):
+                self._bump_locked()
+
+    def _set_likes_locked(self, eventid, likes):
+        row = self._events.get(eventid)
+        if row is None or row["likes"] == likes:
+            return False
+        old = row["likes"] or 0
+        self._drop_likes_locked(row)
+        # A new dict, so rows already handed to readers stay unchanged
+        self._events[eventid] = row = dict(row, likes=likes)
+        self._stamps[eventid] = (row_tag(row), time.time())
+        bisect.insort(self._by_likes, (-likes, eventid))
+        self._credit_locked(row["username"], 0, likes - old)
+        return True
+
+    # --- Reads ---
+    # Rows are shared with the index; callers must not modify them.
+
+    def get(self, eventid):
+        return self._events.get(eventid)
+
+    def all(self):
+        with self._lock:
+            return list(self._events.values())
+
+    def stamp(self, eventid):
+        """(tag, modified) for an active event, or None."""
+        return self._stamps.get(eventid)
+
+    def listing_stamp(self):
+        """(tag, modified) over all active events; the tag changes with any add, delete or like."""
+        with self._lock:
+            version, tag, modified = self._listing
+            if version != self.version:
+                new_tag = hashlib.sha1(repr(sorted((eid, t) for eid, (t, _) in self._stamps.items())).encode()).hexdigest()[:20]
+                if new_tag != tag:
+                    # First time: newest event; after that the change (maybe a delete) happened now
+                    modified = time.time() if tag is not None else max((m for _, m in self._stamps.values()), default=time.time())
+                    tag = new_tag
+                self._listing = (self.version, tag, modified)
+            return tag, modified
+
+    def categories(self):
+        """Category names in order of their first event."""
+        with self._lock:
+            return list(dict.fromkeys(r["category"] for r in self._events.values()))
+
+    def _ordering_locked(self, sort):
+        cached = self._orderings.get(sort)
+        if cached is None or cached[0] != self.version:
+            cached = (self.version, sorted((sort_value(r, sort), eid) for eid, r in self._events.items()))
+            self._orderings[sort] = cached
+        return cached[1]
+
+    def query(self, categories=None, text=None, date_from=None, date_to=None, owner=None,
+              sort="eventstartdate", descending=False, after=None, limit=None):
+        """
+        One page of the events matching every given filter, ordered by
+        (sort value, eventid). `after` is the cursor of the previous page's
+        last row. Returns (rows, cursor for the next page or None, total).
+        `text` matches words or word prefixes in the name, category, location
+        or description. Dates are YYYY-MM-DD; an event matches if it overlaps
+        the range.
+        """
+        if sort not in SORT_FIELDS:
+            raise ValueError(f"Cannot sort by {sort}")
+        after = decode_cursor(after, sort) if after else None
+        categories = set(categories) if categories else None
+        found = self.search.scores(text) if tokenize(text) else None
+
+        def matches(row):
+            return ((categories is None or row["category"] in categories)
+                    and (owner is None or row["username"] == owner)
+                    and (date_from is None or (row["eventenddate"] or "") >= date_from)
+                    and (date_to is None or (row["eventstartdate"] or "") <= date_to)
+                    and (found is None or row["eventid"] in found))
+
+        page, total = [], 0
+        with self._lock:
+            keys = self._ordering_locked(sort)
+            for key in (reversed(keys) if descending else keys):
+                row = self._events[key[1]]
+                if not matches(row):
+                    continue
+                total += 1
+                if after is not None and (key >= after if descending else key <= after):
+                    continue
+                if limit is None or len(page) <= limit:
+                    page.append((key, row))
+        more = limit is not None and len(page) > limit
+        page = page[:limit] if more else page
+        return [row for _, row in page], encode_cursor(page[-1][0]) if more else None, total
+
+    def between(self, start, end):
+        """
+        Events overlapping [start, end) (YYYY-MM-DD), in start date order.
+        Uses the eventstartdate ordering, so only events starting before
+        `end` are looked at.
+        """
+        with self._lock:
+            keys = self._ordering_locked("eventstartdate")
+            stop = bisect.bisect_left(keys, (end,))
+            rows = (self._events[eid] for _, eid in keys[:stop])
+            return [row for row in rows if (row["eventenddate"] or "") >= start]
+
+    def trending(self, n=4):
+        with self._lock:
+            return [self._events[eid] for _, eid in self._by_likes[:n]]
+
+    def top_organizers(self, n=5, by="events"):
+        """[(username, total)] for the n organizers with most active events (or most likes on them)."""
+        with self._lock:
+            return [(username, -total) for total, username in self._leaders[by][:n] if total]
+
+    def __len__(self):
+        return len(self._events)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "events": len(self._events),
+                "categories": len({r["category"] for r in self._events.values()}),
+                "version": self.version,
+                "search": self.search.stats(),
+                "age": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at is not None else None,
+            }
+
+
+event_index = EventIndex(resync=float(os.environ.get("EVENT_INDEX_RESYNC", 60)))
@@ -0,0 +1,113 @@
+import asyncio
+import datetime
+import heapq
+import os
+import socket
+import threading
+import time
+import uuid
+import zoneinfo
+
+
+ist = zoneinfo.ZoneInfo("Asia/Kolkata")
+
+
+def end_timestamp(enddate, endtime):
+    """Epoch seconds for an IST eventenddate/eventendtime pair, or None if unparseable."""
+    try:
+        return int(datetime.datetime.strptime(f"{enddate} {endtime}", "%Y-%m-%d %H:%M").replace(tzinfo=ist).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+class ExpiryScheduler:
+    """
+    Min-heap of (ends_at, eventid) for active events.
+    Removals are lazy: _ends holds the live end time per event, and heap
+    entries that no longer match it are skipped when popped.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._heap = []
+        self._ends = {}
+        self._loop = None
+        self._wake = None
+
+    def bind(self, loop):
+        self._loop = loop
+        self._wake = asyncio.Event()
+
+    def _notify(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def load(self, rows):
+        """Rebuilds the heap from (eventid, ends_at) pairs."""
+        with self._lock:
+            self._ends = {eid: ends for eid, ends in rows if ends is not None}
+            self._heap = [(ends, eid) for eid, ends in self._ends.items()]
+            heapq.heapify(self._heap)
+        self._notify()
+
+    def add(self, eventid, ends_at):
+        if ends_at is None:
+            return
+        with self._lock:
+            self._ends[eventid] = ends_at
+            heapq.heappush(self._heap, (ends_at, eventid))
+        self._notify()
+
+    def discard(self, eventid):
+        with self._lock:
+            self._ends.pop(eventid, None)
+
+    def next_due(self):
+        with self._lock:
+            while self._heap and self._ends.get(self._heap[0][1]) != self._heap[0][0]:
+                heapq.heappop(self._heap)
+            return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now):
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                ends, eid = heapq.heappop(self._heap)
+                if self._ends.get(eid) == ends:
+                    del self._ends[eid]
+                    due.append(eid)
+        return due
+
+    def __len__(self):
+        with self._lock:
+            return len(self._ends)
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=max(0, timeout))
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+
+expiry_scheduler = ExpiryScheduler()
+
+
+# --- Leader lease: only the worker holding it runs the expiry loop ---
+
+LEASE_OWNER = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+def try_acquire_lease(c, name, ttl, owner=LEASE_OWNER):
+    """Takes or renews the named lease; True if `owner` holds it afterwards."""
+    now = time.time()
+    c.execute("INSERT OR IGNORE INTO scheduler_leases(name, owner, expires_at) VALUES (?, ?, 0)", (name, owner))
+    c.execute(
+        "UPDATE scheduler_leases SET owner=?, expires_at=? WHERE name=? AND (owner=? OR expires_at<?)",
+        (owner, now + ttl, name, owner, now)
+    )
+    row = c.execute("SELECT owner FROM scheduler_leases WHERE name=?", (name,)).fetchone()
+    return bool(row) and row["owner"] == owner
+
+
+def release_lease(c, name, owner=LEASE_OWNER):
+    c.execute("UPDATE scheduler_leases SET expires_at=0 WHERE name=? AND owner=?", (name, owner))
@@ -0,0 +1,112 @@
+"""
+Per-user data export, streamed as CSV or NDJSON. Every section is read in
+keyset pages of `batch` rows (one joined query per page), so memory stays the
+same however much history a user has and no pooled connection is held while
+the client downloads.
+"""
+import csv
+import io
+import json
+
+
+EVENT_COLUMNS = "e.eventid, e.eventname, e.location, e.category, e.eventstartdate, e.eventenddate, e.description, e.likes"
+
+# name -> (title, [(column, heading)] or None for the event columns, query). Queries take (username, last key, limit)
+# and return a `_key` column to continue from.
+SECTIONS = {
+    "profile": ("USER PROFILE", [("name", "Name"), ("username", "Username"), ("email", "Email"), ("role", "Role")],
+                "SELECT 0 AS _key, name, username, email, role FROM userdetails WHERE username=? AND 0>? LIMIT ?"),
+    "created": ("CREATED EVENTS", None,
+                f"""SELECT o.eventid AS _key, {EVENT_COLUMNS} FROM event_owners o
+                    JOIN eventdetail e ON e.eventid = o.eventid
+                    WHERE o.username=? AND o.eventid>? ORDER BY o.eventid LIMIT ?"""),
+    "liked": ("LIKED EVENTS", None,
+              f"""SELECT l.eventid AS _key, {EVENT_COLUMNS}, 'active' AS status FROM event_likes l
+                  JOIN eventdetail e ON e.eventid = l.eventid
+                  WHERE l.username=? AND l.eventid>? ORDER BY l.eventid LIMIT ?"""),
+    "liked_ended": ("LIKED EVENTS", None,
+                    f"""SELECT e.rowid AS _key, {EVENT_COLUMNS}, 'ended' AS status FROM event_likes l
+                        JOIN endedevent e ON e.eventid = l.eventid
+                        WHERE l.username=? AND e.rowid>? ORDER BY e.rowid LIMIT ?"""),
+    "ended": ("ENDED EVENTS", None,
+              f"""SELECT e.rowid AS _key, {EVENT_COLUMNS} FROM endedevent e
+                  WHERE e.username=? AND e.rowid>? ORDER BY e.rowid LIMIT ?"""),
+    "chat": ("CHAT MESSAGES", [("eventid", "Event ID"), ("message", "Message"), ("created_at", "Sent At")],
+             "SELECT id AS _key, eventid, message, created_at FROM chat_messages WHERE username=? AND id>? ORDER BY id LIMIT ?"),
+}
+EVENT_HEADINGS = [("eventid", "Event ID"), ("eventname", "Name"), ("location", "Location"), ("category", "Category"),
+                  ("eventstartdate", "Start Date"), ("eventenddate", "End Date"), ("description", "Description"),
+                  ("likes", "Likes")]
+SCOPES = ("profile", "created", "liked", "ended", "chat")
+EXPORT_FORMATS = {"csv": ("text/csv", "csv"), "ndjson": ("application/x-ndjson", "ndjson")}
+
+
+def parse_export_scopes(value):
+    """Ordered section names for a comma list of scopes; ValueError for unknown ones."""
+    if not value:
+        scopes = SCOPES
+    else:
+        scopes = [s.strip() for s in value.split(",") if s.strip()]
+        unknown = [s for s in scopes if s not in SCOPES]
+        if unknown:
+            raise ValueError(f"Unknown export scope: {', '.join(unknown)}")
+    sections = []
+    for scope in SCOPES:
+        if scope in scopes:
+            sections += ["liked", "liked_ended"] if scope == "liked" else [scope]
+    return sections
+
+
+def _headings(name):
+    headings = SECTIONS[name][1] or EVENT_HEADINGS
+    if name.startswith("liked"):
+        headings = headings + [("status", "Status")]
+    return headings
+
+
+async def _pages(fetch, name, username, batch):
+    query = SECTIONS[name][2]
+    last = -1
+    while True:
+        rows = await fetch(query, (username, last, batch))
+        if rows:
+            yield rows
+        if len(rows) < batch:
+            return
+        last = rows[-1]["_key"]
+
+
+async def export_chunks(fetch, username, sections, fmt="csv", batch=500):
+    """
+    Yields the export as text chunks, one per page of rows. `fetch(query, params)`
+    is an async function returning the rows of one query.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+
+    def flush():
+        data = buf.getvalue()
+        buf.seek(0)
+        buf.truncate()
+        return data
+
+    title = None
+    for name in sections:
+        headings = _headings(name)
+        # liked and liked_ended share one CSV block
+        if fmt == "csv" and SECTIONS[name][0] != title:
+            if title:
+                writer.writerow([])
+            title = SECTIONS[name][0]
+            writer.writerow([f"--- {title} ---"])
+            writer.writerow([h for _, h in headings])
+        async for rows in _pages(fetch, name, username, batch):
+            for row in rows:
+                if fmt == "csv":
+                    writer.writerow([row[col] for col, _ in headings])
+                else:
+                    record = {"section": name.split("_")[0], **{col: row[col] for col, _ in headings}}
+                    buf.write(json.dumps(record, ensure_ascii=False) + "\n")
+            yield flush()
+        if buf.tell():
+            yield flush()
@@ -0,0 +1,66 @@
+"""
+Minimal stand-in for the Resend API, for exercising the mail outbox locally.
+
+    python -m modules.fake_resend 8025
+    RESEND_API_URL=http://127.0.0.1:8025 uvicorn app:app
+
+Accepts POST /emails and POST /emails/batch, prints each mail and replays
+the stored response for a repeated Idempotency-Key like Resend does.
+Set FAKE_RESEND_FAIL_RATE=0.3 to make a share of requests return 500.
+"""
+import json
+import os
+import random
+import sys
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+_seen = {}
+_lock = threading.Lock()
+
+
+class FakeResendHandler(BaseHTTPRequestHandler):
+    def _reply(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b"null")
+        except ValueError:
+            return self._reply(422, {"statusCode": 422, "name": "validation_error", "message": "Invalid JSON"})
+
+        if self.path not in ("/emails", "/emails/batch"):
+            return self._reply(404, {"statusCode": 404, "name": "not_found", "message": self.path})
+        if random.random() < float(os.environ.get("FAKE_RESEND_FAIL_RATE", 0)):
+            return self._reply(500, {"statusCode": 500, "name": "internal_server_error", "message": "Injected failure"})
+
+        key = self.headers.get("Idempotency-Key")
+        with _lock:
+            if key and key in _seen:
+                print(f"Replayed {self.path} for idempotency key {key}")
+                return self._reply(200, _seen[key])
+            mails = payload if self.path == "/emails/batch" else [payload]
+            ids = [str(uuid.uuid4()) for _ in mails]
+            for mail, mail_id in zip(mails, ids):
+                print(f"[{mail_id}] to={mail.get('to')} subject={mail.get('subject')!r}")
+            body = {"data": [{"id": i} for i in ids]} if self.path == "/emails/batch" else {"id": ids[0]}
+            if key:
+                _seen[key] = body
+        self._reply(200, body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8025
+    print(f"Fake Resend listening on http://127.0.0.1:{port}")
+    ThreadingHTTPServer(("127.0.0.1", port), FakeResendHandler).serve_forever()
@@ -0,0 +1,69 @@
+import collections
+import threading
+
+from jinja2 import pass_context
+from markupsafe import Markup
+
+
+class FragmentCache:
+    """
+    Rendered template fragments keyed by (template, fragment, lang).
+    Fragments may only depend on the language, not on the user or event.
+    Everything is dropped when `version()` changes, which is the translation
+    store's version, so new translations show up on the next render.
+    """
+    def __init__(self, version, max_entries=1024):
+        self._version = version
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = collections.OrderedDict()
+        self._seen_version = None
+        self._hits = 0
+        self._misses = 0
+
+    def get_or_render(self, key, render):
+        version = self._version()
+        with self._lock:
+            if version != self._seen_version:
+                self._entries.clear()
+                self._seen_version = version
+            html = self._entries.get(key)
+            if html is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return html
+            self._misses += 1
+
+        html = render()
+        with self._lock:
+            # Only keep it if no translation arrived while rendering
+            if self._seen_version == version:
+                self._entries[key] = html
+                if len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return html
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self._hits,
+                "misses": self._misses,
+                "version": self._seen_version,
+            }
+
+    def jinja_tag(self):
+        """
+        Template global used as
+            {% call fragment("nav") %}...static markup...{% endcall %}
+        The block body is rendered once per language and reused afterwards.
+        """
+        @pass_context
+        def fragment(context, name, caller):
+            key = (context.name, name, context.get("user_language") or "en")
+            return Markup(self.get_or_render(key, lambda: str(caller())))
+        return fragment
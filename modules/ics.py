@@ -0,0 +1,76 @@
+"""
+iCalendar (RFC 5545) output for events: one event per download, or whole
+feeds that calendar apps subscribe to. Text is escaped, lines are folded at
+75 octets and end in CRLF. Event times are IST, as entered.
+"""
+import datetime
+
+
+TZID = "Asia/Kolkata"
+VTIMEZONE = (
+    "BEGIN:VTIMEZONE", f"TZID:{TZID}",
+    "BEGIN:STANDARD", "DTSTART:19700101T000000", "TZOFFSETFROM:+0530", "TZOFFSETTO:+0530", "TZNAME:IST", "END:STANDARD",
+    "END:VTIMEZONE",
+)
+
+
+def escape_text(value):
+    return (str(value or "").replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,")
+            .replace("\r\n", "\\n").replace("\n", "\\n").replace("\r", "\\n"))
+
+
+def fold(line):
+    """Splits a content line into 75-octet pieces without cutting a UTF-8 character."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        while end < len(data) and (data[end] & 0xC0) == 0x80:  # continuation byte
+            end -= 1
+        parts.append(data[start:end].decode("utf-8"))
+        start, limit = end, 74  # continuation lines start with a space
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _local_time(date, time):
+    """YYYYMMDDTHHMMSS from the stored date/time strings, or None."""
+    try:
+        return datetime.datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M").strftime("%Y%m%dT%H%M%S")
+    except (TypeError, ValueError):
+        return None
+
+
+def vevent(e, dtstamp, url=None):
+    """Folded lines of one VEVENT for an eventdetail row."""
+    start = _local_time(e["eventstartdate"], e["eventstarttime"])
+    end = _local_time(e["eventenddate"], e["eventendtime"]) or start
+    lines = ["BEGIN:VEVENT", f"UID:SahyogSutra-{e['eventid']}", f"DTSTAMP:{dtstamp.strftime('%Y%m%dT%H%M%SZ')}"]
+    if start:
+        lines += [f"DTSTART;TZID={TZID}:{start}", f"DTEND;TZID={TZID}:{end}"]
+    lines += [
+        f"SUMMARY:{escape_text(e['eventname'])}",
+        f"DESCRIPTION:{escape_text(e['description'])}",
+        f"LOCATION:{escape_text(e['location'])}",
+        f"CATEGORIES:{escape_text(e['category'])}",
+    ]
+    if url:
+        lines.append(f"URL:{url}")
+    lines.append("END:VEVENT")
+    return "".join(fold(line) for line in lines)
+
+
+def calendar_chunks(events, dtstamp_for, name=None, url_for=None, refresh="PT1H"):
+    """
+    Yields the calendar piece by piece: header, one chunk per event, footer.
+    `events` may be any iterable, it is consumed lazily; `dtstamp_for(e)` gives
+    each event's DTSTAMP as an aware UTC datetime.
+    """
+    header = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//SahyogSutra//Events//EN", "CALSCALE:GREGORIAN"]
+    if name:
+        header += [f"X-WR-CALNAME:{escape_text(name)}", f"REFRESH-INTERVAL;VALUE=DURATION:{refresh}", f"X-PUBLISHED-TTL:{refresh}"]
+    yield "".join(fold(line) for line in (*header, *VTIMEZONE))
+    for e in events:
+        yield vevent(e, dtstamp_for(e), url_for(e) if url_for else None)
+    yield fold("END:VCALENDAR")
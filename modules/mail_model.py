@@ -1,12 +1,11 @@
-import os
+# import os
 # import smtplib
 # import ssl
-import threading
 
-import resend
 
 # from email.message import EmailMessage
 
+from .notify import notifier
 from .sendlog_model import sendlog
 
 
@@ -25,18 +24,15 @@ from .sendlog_model import sendlog
 #         smtp.send_message(msg)
 #         sendlog(f"Email sent to {receiver}")
 
-def sendmailthread(receiver, subject, message, type="text"):
-
-    resend.api_key = os.environ.get("RESEND_API_KEY")
-
-    r = resend.Emails.send({
+def mailparams(receiver, subject, message, type="text"):
+    return {
       "from": "SahyogSutra Support <support@sahyogsutra.run.place>",
       "to": str(receiver),
       "subject": str(subject),
       type: f"{message}"
-    })
+    }
 
 
-def sendmail(receiver, subject, message):
-    thread = threading.Thread(target=sendmailthread, args=(receiver, subject, message))
-    thread.start()
+def sendmail(receiver, subject, message, type="text"):
+    """Queues a mail on the notification dispatcher; sent (and retried) in the background."""
+    return notifier.mail(mailparams(receiver, subject, message, type))
@@ -0,0 +1,134 @@
+import ast
+
+from .db_pool import transaction
+from .expiry import end_timestamp
+
+
+def _split_ids(value):
+    return [x.strip() for x in (value or "").split(",") if x.strip().isdigit()]
+
+
+def _event_likes_and_owners(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS event_likes (
+        username TEXT NOT NULL,
+        eventid INTEGER NOT NULL,
+        PRIMARY KEY (username, eventid))""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_event_likes_eventid ON event_likes(eventid)")
+    c.execute("""CREATE TABLE IF NOT EXISTS event_owners (
+        eventid INTEGER PRIMARY KEY,
+        username TEXT NOT NULL)""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_event_owners_username ON event_owners(username)")
+
+    # Backfill from the legacy comma-joined userdetails.likes / userdetails.events strings
+    live = {r["eventid"] for r in c.execute("SELECT eventid FROM eventdetail").fetchall()}
+    likes, owners = [], []
+    for u in c.execute("SELECT username, likes, events FROM userdetails").fetchall():
+        likes += [(u["username"], int(x)) for x in _split_ids(u["likes"]) if int(x) in live]
+        owners += [(int(x), u["username"]) for x in _split_ids(u["events"]) if int(x) in live]
+    if likes:
+        c.executemany("INSERT OR IGNORE INTO event_likes(username, eventid) VALUES (?, ?)", likes)
+    if owners:
+        c.executemany("INSERT OR IGNORE INTO event_owners(eventid, username) VALUES (?, ?)", owners)
+    c.execute("INSERT OR IGNORE INTO event_owners(eventid, username) SELECT eventid, username FROM eventdetail")
+
+    # Like counters now mirror event_likes
+    c.execute("""UPDATE eventdetail SET likes =
+        (SELECT COUNT(*) FROM event_likes l WHERE l.eventid = eventdetail.eventid)""")
+
+
+def _chat_messages(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS chat_messages (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        eventid INTEGER NOT NULL,
+        username TEXT NOT NULL,
+        message TEXT NOT NULL,
+        created_at TEXT NOT NULL)""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_event ON chat_messages(eventid, id)")
+
+    # One-off copy of the legacy messages2 blobs (str() of a list of (user, msg, time) tuples)
+    for row in c.execute("SELECT eventid, msgs FROM messages2").fetchall():
+        try:
+            msgs = ast.literal_eval(row["msgs"]) if row["msgs"] else []
+        except (ValueError, SyntaxError) as e:
+            print(f"Skipping unreadable messages2 row for event {row['eventid']}: {e}")
+            continue
+        if msgs:
+            c.executemany(
+                "INSERT INTO chat_messages(eventid, username, message, created_at) VALUES (?, ?, ?, ?)",
+                [(row["eventid"], m[0], m[1], m[2]) for m in msgs]
+            )
+
+
+def _scheduler_leases(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS scheduler_leases (
+        name TEXT PRIMARY KEY,
+        owner TEXT NOT NULL,
+        expires_at REAL NOT NULL)""")
+
+
+def _event_ends_at(c):
+    columns = [r["name"] for r in c.execute("PRAGMA table_info(eventdetail)").fetchall()]
+    if "ends_at" not in columns:
+        c.execute("ALTER TABLE eventdetail ADD COLUMN ends_at INTEGER")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_eventdetail_ends_at ON eventdetail(ends_at)")
+
+    rows = c.execute("SELECT eventid, eventenddate, eventendtime FROM eventdetail").fetchall()
+    updates = [(end_timestamp(r["eventenddate"], r["eventendtime"]), r["eventid"]) for r in rows]
+    for ends_at, eid in updates:
+        if ends_at is None:
+            print(f"Event {eid} has an unparseable end date/time, it will not expire automatically")
+    if updates:
+        c.executemany("UPDATE eventdetail SET ends_at=? WHERE eventid=?", updates)
+
+
+def _mail_outbox(c):
+    c.execute("""CREATE TABLE IF NOT EXISTS mail_outbox (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        idempotency_key TEXT NOT NULL UNIQUE,
+        params TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending',
+        attempts INTEGER NOT NULL DEFAULT 0,
+        last_error TEXT,
+        next_attempt_at REAL NOT NULL DEFAULT 0,
+        claimed_by TEXT,
+        claimed_at REAL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        sent_at REAL)""")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_mail_outbox_due ON mail_outbox(status, next_attempt_at)")
+
+
+def _export_indexes(c):
+    # Data export pages through a user's messages and ended events
+    c.execute("CREATE INDEX IF NOT EXISTS idx_chat_messages_user ON chat_messages(username, id)")
+    c.execute("CREATE INDEX IF NOT EXISTS idx_endedevent_user ON endedevent(username)")
+
+
+MIGRATIONS = [
+    ("0001_event_likes_owners", _event_likes_and_owners),
+    ("0002_chat_messages", _chat_messages),
+    ("0003_scheduler_leases", _scheduler_leases),
+    ("0004_eventdetail_ends_at", _event_ends_at),
+    ("0005_mail_outbox", _mail_outbox),
+    ("0006_export_indexes", _export_indexes),
+]
+
+
+def migrate(c):
+    """
+    Applies pending schema migrations in order; each one runs at most once.
+    A migration and its schema_migrations row commit together in one
+    BEGIN IMMEDIATE transaction, and whether it is applied is re-checked under
+    that write lock, so workers starting together (or a restart after a crash
+    mid-migration) neither repeat nor half-apply one.
+    """
+    c.execute("CREATE TABLE IF NOT EXISTS schema_migrations (name TEXT PRIMARY KEY, applied_at TEXT DEFAULT CURRENT_TIMESTAMP)")
+    applied = {r["name"] for r in c.execute("SELECT name FROM schema_migrations").fetchall()}
+    for name, fn in MIGRATIONS:
+        if name in applied:
+            continue
+        with transaction(c):
+            if c.execute("SELECT 1 FROM schema_migrations WHERE name=?", (name,)).fetchone():
+                continue  # another worker got there first
+            print(f"Applying migration {name}")
+            fn(c)
+            c.execute("INSERT INTO schema_migrations(name) VALUES (?)", (name,))
@@ -0,0 +1,106 @@
+from . import sendlog
+from .detailformat import detailsformat
+from .expiry import expiry_scheduler, end_timestamp
+from .outbox import enqueue_mails, outbox_wakeup
+from .db_pool import transaction
+from .event_index import event_index
+
+FIELDS = ["eventname", "email", "eventstarttime", "eventendtime", "eventstartdate", "eventenddate", "location", "category", "description", "username"]
+MAX_BULK = 500  # request ids per call
+
+
+def _marks(values):
+    return ", ".join(["?"] * len(values))
+
+
+def _pending(c, eventids):
+    eventids = sorted(set(eventids))
+    rows = c.execute(f"SELECT * FROM eventreq WHERE eventid IN ({_marks(eventids)}) ORDER BY eventid", eventids).fetchall()
+    found = [dict(r) for r in rows]
+    skipped = {eid: "Not pending" for eid in set(eventids) - {r["eventid"] for r in found}}
+    return found, skipped
+
+
+def _publish(c, eventids):
+    """The inserts of approve_requests; returns (published rows, {request id: event id}, skipped)."""
+    found, skipped = _pending(c, eventids)
+    if found:
+        names = sorted({r["eventname"] for r in found})
+        live = {tuple(r[f] for f in FIELDS) for r in c.execute(
+            f"SELECT {', '.join(FIELDS)} FROM eventdetail WHERE eventname IN ({_marks(names)})", names).fetchall()}
+        for eid in [r["eventid"] for r in found if tuple(r[f] for f in FIELDS) in live]:
+            skipped[eid] = "Event Already Exists"
+        found = [r for r in found if r["eventid"] not in skipped]
+
+    if not found:
+        return [], {}, skipped
+
+    # AUTOINCREMENT picks the event ids: a request id may belong to an ended or
+    # deleted event whose likes and outbox keys must not carry over
+    columns = ", ".join(FIELDS)
+    event_ids = {}
+    for r in found:
+        c.execute(f"INSERT INTO eventdetail({columns}, ends_at) VALUES ({_marks(FIELDS)}, ?)",
+                  (*(r[f] for f in FIELDS), end_timestamp(r["eventenddate"], r["eventendtime"])))
+        event_ids[r["eventid"]] = c.lastrowid
+    c.executemany("INSERT OR IGNORE INTO event_owners(eventid, username) VALUES (?, ?)",
+                  [(event_ids[r["eventid"]], r["username"]) for r in found])
+    request_ids = list(event_ids)
+    c.execute(f"DELETE FROM eventreq WHERE eventid IN ({_marks(request_ids)})", request_ids)
+    ids = list(event_ids.values())
+    published = [dict(r) for r in c.execute(f"SELECT * FROM eventdetail WHERE eventid IN ({_marks(ids)}) ORDER BY eventid", ids).fetchall()]
+
+    enqueue_mails(c, [
+        (f"event-approved:{e['eventid']}", e["email"], "Event Approved",
+         f'Congragulations\n\nYour Event is approved and now visible on Campaigns Page.\n\nEvent Details:\n\n{detailsformat(e)}\n\nThank You!')
+        for e in published
+    ])
+    return published, event_ids, skipped
+
+
+def approve_requests(c, eventids):
+    """
+    Publishes the given event requests in one transaction: each becomes an
+    event under a new id, with its owner row and an "Event Approved" mail.
+    Requests that duplicate a live event are left pending. The event index and
+    expiry scheduler learn of the new events only once the transaction commits.
+    Returns {"approved": {request id: event id}, "skipped": {request id: reason}}.
+    """
+    with transaction(c):
+        published, event_ids, skipped = _publish(c, eventids)
+
+    outbox_wakeup.set()
+    for e in published:
+        expiry_scheduler.add(e["eventid"], e["ends_at"])
+        event_index.upsert(e)
+    if published:
+        sendlog(f"#EventAdd \n{len(published)} Events Added: " + ", ".join(f"{e['eventid']} {e['eventname']}" for e in published))
+    return {"approved": event_ids, "skipped": skipped}
+
+
+def decline_requests(c, eventids, reason, admin):
+    """
+    Drops the given event requests in one transaction and queues a "Event
+    Declined" mail with `reason` for each. Returns {"declined": [ids], "skipped": {id: reason}}.
+    """
+    with transaction(c):
+        found, skipped = _pending(c, eventids)
+        if not found:
+            return {"declined": [], "skipped": skipped}
+
+        ids = [r["eventid"] for r in found]
+        c.execute(f"DELETE FROM eventreq WHERE eventid IN ({_marks(ids)})", ids)
+        # Keep eventdetail ids in step with request ids, as addevent expects
+        seq = c.execute("SELECT seq FROM sqlite_sequence WHERE name=?", ("eventreq",)).fetchone()
+        if seq:
+            c.execute("UPDATE sqlite_sequence SET seq=? WHERE name=?", (seq["seq"], "eventdetail"))
+
+        enqueue_mails(c, [
+            (f"event-declined:{r['eventid']}", r["email"], "Event Declined",
+             f"We sorry to inform to you that your event was declined for following reason:\n{reason}.\n\nEvent Details:\n\n{detailsformat(r)}\n\nThank You!")
+            for r in found
+        ])
+
+    outbox_wakeup.set()
+    sendlog(f"#EventDecline \n{len(found)} Events Declined by {admin}\nReason: {reason}.\nEvents: " + ", ".join(f"{r['eventid']} {r['eventname']}" for r in found))
+    return {"declined": ids, "skipped": skipped}
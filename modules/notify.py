@@ -0,0 +1,236 @@
+import collections
+import os
+import queue
+import threading
+import time
+
+import requests
+import resend
+from requests.adapters import HTTPAdapter
+
+
+TG_CHAT_ID = "-1002945250812"
+TG_MAX_CHARS = 4096
+
+# One pooled session for every outbound notification call
+http_session = requests.Session()
+http_session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+
+
+class SessionHTTPClient(resend.HTTPClient):
+    """Resend HTTP client that reuses http_session instead of opening a connection per mail."""
+    def __init__(self, session, timeout=15):
+        self._session = session
+        self._timeout = timeout
+
+    def request(self, method, url, headers, json=None, files=None, data=None):
+        try:
+            resp = self._session.request(
+                method=method, url=url, headers=headers,
+                json=json if data is None and files is None else None,
+                files=files, data=data, timeout=self._timeout
+            )
+        except requests.RequestException as e:
+            raise RuntimeError(f"Request failed: {e}") from e
+        return resp.content, resp.status_code, resp.headers
+
+
+resend.default_http_client = SessionHTTPClient(http_session)
+# Point at a local fake (python -m modules.fake_resend) for testing
+resend.api_url = os.environ.get("RESEND_API_URL", resend.api_url).rstrip("/")
+
+
+class RetryLater(Exception):
+    def __init__(self, message, delay=None):
+        super().__init__(message)
+        self.delay = delay
+
+
+def post_telegram(text):
+    resp = http_session.post(
+        f"https://api.telegram.org/bot{os.environ.get('TGBOTTOKEN')}/sendMessage",
+        data={"chat_id": TG_CHAT_ID, "text": text[:TG_MAX_CHARS]},
+        timeout=15
+    )
+    if resp.status_code == 429:
+        try:
+            delay = resp.json().get("parameters", {}).get("retry_after")
+        except ValueError:
+            delay = None
+        raise RetryLater("Telegram rate limit", delay)
+    resp.raise_for_status()
+
+
+def send_resend(params, idempotency_key=None):
+    resend.api_key = os.environ.get("RESEND_API_KEY")
+    return resend.Emails.send(params, {"idempotency_key": idempotency_key} if idempotency_key else None)
+
+
+def _batch_lines(lines, limit=TG_MAX_CHARS):
+    """Packs log lines into as few messages of at most `limit` chars as possible."""
+    batch, size = [], 0
+    for line in lines:
+        line = line[:limit]
+        if batch and size + len(line) + 1 > limit:
+            yield "\n".join(batch)
+            batch, size = [], 0
+        batch.append(line)
+        size += len(line) + 1
+    if batch:
+        yield "\n".join(batch)
+
+
+class NotificationDispatcher:
+    """
+    Persistent background sender for mails and Telegram log lines.
+    Mails go through a bounded queue served by a few worker threads; log
+    lines are buffered and flushed as batched Telegram messages every
+    log_interval seconds. Failed sends are retried with exponential backoff,
+    and anything arriving while the queue is full is dropped and counted.
+    """
+    def __init__(self, max_queue=1000, workers=2, log_interval=2.0, max_attempts=4, backoff=1.0,
+                 send_mail=send_resend, send_log=post_telegram):
+        self.max_queue = max_queue
+        self.workers = workers
+        self.log_interval = log_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self._send_mail = send_mail
+        self._send_log = send_log
+
+        self._mails = queue.Queue(maxsize=max_queue)
+        self._logs = collections.deque()
+        self._lock = threading.Lock()
+        self._log_ready = threading.Condition(self._lock)
+        self._stopping = threading.Event()
+        self._threads = []
+
+        self._counts = collections.Counter()
+
+    def _start_locked(self):
+        if self._threads or self._stopping.is_set():
+            return
+        for i in range(self.workers):
+            t = threading.Thread(target=self._mail_worker, name=f"notify-mail-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        t = threading.Thread(target=self._log_worker, name="notify-log", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._counts[key] += n
+
+    # --- Producers ---
+
+    def mail(self, params):
+        with self._lock:
+            self._start_locked()
+            if self._stopping.is_set():
+                self._counts["dropped"] += 1
+                return False
+        try:
+            self._mails.put_nowait(params)
+        except queue.Full:
+            self._count("dropped")
+            print(f"Notification queue full, dropping mail to {params.get('to')}")
+            return False
+        return True
+
+    def log(self, text):
+        with self._lock:
+            self._start_locked()
+            if self._stopping.is_set() or len(self._logs) >= self.max_queue:
+                self._counts["dropped"] += 1
+                return False
+            self._logs.append(text)
+            return True
+
+    # --- Workers ---
+
+    def _attempt(self, fn, arg, what):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                fn(arg)
+                self._count("sent")
+                return True
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self._count("failed")
+                    print(f"Giving up on {what} after {attempt} attempts: {e}")
+                    return False
+                self._count("retried")
+                delay = getattr(e, "delay", None) or self.backoff * 2 ** (attempt - 1)
+                # Stop backing off once shutdown has begun; one last try is made straight away
+                self._stopping.wait(delay)
+
+    def _mail_worker(self):
+        while True:
+            params = self._mails.get()
+            try:
+                if params is None:
+                    return
+                self._attempt(self._send_mail, params, f"mail to {params.get('to')}")
+            finally:
+                self._mails.task_done()
+
+    def _log_worker(self):
+        while True:
+            with self._log_ready:
+                if not self._stopping.is_set():
+                    self._log_ready.wait(self.log_interval)
+                lines = list(self._logs)
+                self._logs.clear()
+                stopping = self._stopping.is_set()
+            if lines:
+                batches = list(_batch_lines(lines))
+                self._count("log_lines", len(lines))
+                self._count("log_batches", len(batches))
+                for text in batches:
+                    self._attempt(self._send_log, text, "log batch")
+            if stopping:
+                return
+
+    # --- Lifecycle ---
+
+    def drain(self, timeout=10.0):
+        """Stops accepting work, flushes what is queued and waits up to `timeout` seconds."""
+        deadline = time.monotonic() + timeout
+        with self._log_ready:
+            self._stopping.set()
+            self._log_ready.notify_all()
+            threads = list(self._threads)
+        for _ in range(sum(t.name.startswith("notify-mail") for t in threads)):
+            try:
+                self._mails.put(None, timeout=max(0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for t in threads:
+            t.join(max(0, deadline - time.monotonic()))
+        left = self._mails.qsize() + len(self._logs)
+        if left:
+            print(f"Notification drain timed out with {left} item(s) unsent")
+        return left == 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "mail_queue": self._mails.qsize(),
+                "log_queue": len(self._logs),
+                "max_queue": self.max_queue,
+                "workers": self.workers,
+                "sent": self._counts["sent"],
+                "retried": self._counts["retried"],
+                "failed": self._counts["failed"],
+                "dropped": self._counts["dropped"],
+                "log_lines": self._counts["log_lines"],
+                "log_batches": self._counts["log_batches"],
+            }
+
+
+notifier = NotificationDispatcher(
+    max_queue=int(os.environ.get("NOTIFY_QUEUE_SIZE", 1000)),
+    workers=int(os.environ.get("NOTIFY_WORKERS", 2)),
+    log_interval=float(os.environ.get("NOTIFY_LOG_INTERVAL", 2.0)),
+)
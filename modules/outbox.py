@@ -0,0 +1,166 @@
+"""
+Transactional outbox for event emails.
+
+Callers write a row with enqueue_mail() on the same cursor as the event
+change, so the mail exists if and only if the change commits, and wake the
+sender with outbox_wakeup.set() after the commit. A background loop in app.py
+claims due rows, sends them through Resend a few at a time and records the
+outcome. Every row is sent on its own under its unique idempotency key, so a
+row that is sent twice (crash between send and mark, or a timeout after Resend
+accepted it) is only delivered once.
+
+RESEND_API_URL points the sender at another endpoint; a local fake:
+    python -m modules.fake_resend 8025
+    RESEND_API_URL=http://127.0.0.1:8025
+"""
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .expiry import LEASE_OWNER
+from .notify import send_resend
+
+
+MAX_ATTEMPTS = 6
+CLAIM_TIMEOUT = 300  # seconds before a row stuck in 'sending' is claimed again
+BATCH_SIZE = 100  # rows claimed per drain
+SEND_WORKERS = 4  # concurrent Resend calls while draining
+
+_senders = ThreadPoolExecutor(max_workers=SEND_WORKERS, thread_name_prefix="outbox-send")
+
+
+def _mail_params(receiver, subject, message, type):
+    return json.dumps({
+        "from": "SahyogSutra Support <support@sahyogsutra.run.place>",
+        "to": str(receiver),
+        "subject": str(subject),
+        type: f"{message}",
+    })
+
+
+def enqueue_mail(c, key, receiver, subject, message, type="text"):
+    """
+    Queues a mail on cursor `c`; a second call with the same key is ignored.
+    Call outbox_wakeup.set() once the surrounding transaction has committed.
+    """
+    c.execute(
+        "INSERT OR IGNORE INTO mail_outbox(idempotency_key, params, next_attempt_at) VALUES (?, ?, 0)",
+        (key, _mail_params(receiver, subject, message, type))
+    )
+
+
+def enqueue_mails(c, mails, type="text"):
+    """enqueue_mail for many (key, receiver, subject, message) at once, in one statement."""
+    rows = [(key, _mail_params(receiver, subject, message, type)) for key, receiver, subject, message in mails]
+    if rows:
+        c.executemany("INSERT OR IGNORE INTO mail_outbox(idempotency_key, params, next_attempt_at) VALUES (?, ?, 0)", rows)
+
+
+def claim_mail(c, limit=BATCH_SIZE, owner=LEASE_OWNER):
+    """Marks up to `limit` due rows as sending for `owner` and returns them."""
+    now = time.time()
+    token = f"{owner}:{uuid.uuid4().hex[:8]}"
+    c.execute(
+        """UPDATE mail_outbox SET status='sending', claimed_by=?, claimed_at=?
+           WHERE id IN (SELECT id FROM mail_outbox
+                        WHERE (status='pending' AND next_attempt_at <= ?)
+                           OR (status='sending' AND claimed_at < ?)
+                        ORDER BY id LIMIT ?)""",
+        (token, now, now, now - CLAIM_TIMEOUT, limit)
+    )
+    rows = c.execute(
+        "SELECT id, idempotency_key, params, attempts FROM mail_outbox WHERE status='sending' AND claimed_by=?",
+        (token,)
+    ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def deliver(rows):
+    """
+    Sends claimed rows, each with its own idempotency key, so a retry is
+    always recognised by Resend whichever rows it is claimed with. Returns
+    (sent_ids, failures) where failures maps id -> error text.
+    """
+    futures = [(r["id"], _senders.submit(send_resend, json.loads(r["params"]), r["idempotency_key"])) for r in rows]
+    sent, failures = [], {}
+    for mail_id, future in futures:
+        try:
+            future.result()
+            sent.append(mail_id)
+        except Exception as e:
+            failures[mail_id] = str(e)
+    return sent, failures
+
+
+def record_delivery(c, sent, failures):
+    now = time.time()
+    if sent:
+        c.executemany(
+            "UPDATE mail_outbox SET status='sent', sent_at=?, attempts=attempts+1, last_error=NULL WHERE id=?",
+            [(now, i) for i in sent]
+        )
+    for i, error in failures.items():
+        row = c.execute("SELECT attempts FROM mail_outbox WHERE id=?", (i,)).fetchone()
+        attempts = (row["attempts"] if row else 0) + 1
+        status = "failed" if attempts >= MAX_ATTEMPTS else "pending"
+        c.execute(
+            "UPDATE mail_outbox SET status=?, attempts=?, last_error=?, next_attempt_at=? WHERE id=?",
+            (status, attempts, error[:500], now + 30 * 2 ** (attempts - 1), i)
+        )
+
+
+def outbox_summary(c, limit=50):
+    """Counts per status plus the most recent undelivered rows, for the admin view."""
+    counts = {r["status"]: r["n"] for r in c.execute(
+        "SELECT status, COUNT(*) AS n FROM mail_outbox GROUP BY status").fetchall()}
+    rows = c.execute(
+        """SELECT id, idempotency_key, params, status, attempts, last_error, next_attempt_at, created_at
+           FROM mail_outbox WHERE status != 'sent' ORDER BY id DESC LIMIT ?""",
+        (limit,)
+    ).fetchall()
+    undelivered = []
+    for r in rows:
+        r = dict(r)
+        params = json.loads(r.pop("params"))
+        r["to"], r["subject"] = params.get("to"), params.get("subject")
+        undelivered.append(r)
+    return {"counts": counts, "undelivered": undelivered}
+
+
+def retry_mail(c, mail_id):
+    c.execute(
+        "UPDATE mail_outbox SET status='pending', attempts=0, next_attempt_at=0 WHERE id=? AND status='failed'",
+        (mail_id,)
+    )
+    outbox_wakeup.set()
+
+
+class OutboxWakeup:
+    """Lets a committed enqueue_mail (any thread) wake the drain loop instead of waiting for the next poll."""
+    def __init__(self):
+        self._loop = None
+        self._event = None
+        self._lock = threading.Lock()
+
+    def bind(self, loop):
+        with self._lock:
+            self._loop = loop
+            self._event = asyncio.Event()
+
+    def set(self):
+        with self._lock:
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._event.set)
+
+    async def wait(self, timeout):
+        try:
+            await asyncio.wait_for(self._event.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        self._event.clear()
+
+
+outbox_wakeup = OutboxWakeup()
@@ -0,0 +1,152 @@
+import bisect
+import collections
+import heapq
+import math
+import re
+import threading
+
+from markupsafe import Markup, escape
+
+
+TOKEN_RE = re.compile(r"\w+")
+
+# Field -> weight; a hit in the name counts for more than one in the description
+FIELDS = {"eventname": 3.0, "category": 2.0, "location": 2.0, "description": 1.0}
+PREFIX_WEIGHT = 0.6  # a term that is only a prefix of the word scores less than the whole word
+MAX_EXPANSIONS = 64  # words a short prefix may expand to, the most common first
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").casefold())
+
+
+class SearchIndex:
+    """
+    In-memory inverted index over the text fields of active events.
+    Postings map each word to {eventid: weighted term frequency}; the sorted
+    vocabulary makes prefix lookups a bisect. Every query term must match
+    (as a word or a word prefix) and results are ranked by tf-idf.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}  # word -> {eventid: weight}
+        self._vocab = []  # sorted words
+        self._doc_words = {}  # eventid -> set of words, for removal
+
+    def _add_locked(self, row):
+        weights = collections.Counter()
+        for field, weight in FIELDS.items():
+            for word in tokenize(row.get(field)):
+                weights[word] += weight
+        eid = row["eventid"]
+        for word, weight in weights.items():
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = {}
+                bisect.insort(self._vocab, word)
+            postings[eid] = weight
+        self._doc_words[eid] = set(weights)
+
+    def _remove_locked(self, eventid):
+        for word in self._doc_words.pop(eventid, ()):
+            postings = self._postings[word]
+            postings.pop(eventid, None)
+            if not postings:
+                del self._postings[word]
+                del self._vocab[bisect.bisect_left(self._vocab, word)]
+
+    def load(self, rows):
+        with self._lock:
+            self._postings, self._vocab, self._doc_words = {}, [], {}
+            for row in rows:
+                self._add_locked(row)
+
+    def upsert(self, row):
+        with self._lock:
+            self._remove_locked(row["eventid"])
+            self._add_locked(row)
+
+    def discard(self, eventid):
+        with self._lock:
+            self._remove_locked(eventid)
+
+    def _expand_locked(self, term):
+        """
+        Vocabulary words starting with `term`. A short prefix can match far
+        more than MAX_EXPANSIONS words; it then keeps the word itself plus the
+        ones in the most events, rather than the first ones alphabetically.
+        """
+        lo = bisect.bisect_left(self._vocab, term)
+        hi = lo
+        while hi < len(self._vocab) and self._vocab[hi].startswith(term):
+            hi += 1
+        words = self._vocab[lo:hi]
+        if len(words) <= MAX_EXPANSIONS:
+            return words
+        exact = [term] if words[0] == term else []
+        others = words[len(exact):]
+        return exact + heapq.nsmallest(MAX_EXPANSIONS - len(exact), others,
+                                       key=lambda w: (-len(self._postings[w]), w))
+
+    def scores(self, query):
+        """{eventid: score} for events matching every term of the query."""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return {}
+        with self._lock:
+            total = len(self._doc_words) or 1
+            result = None
+            for term in terms:
+                term_scores = collections.defaultdict(float)
+                for word in self._expand_locked(term):
+                    postings = self._postings[word]
+                    idf = math.log(1 + total / len(postings))
+                    boost = 1.0 if word == term else PREFIX_WEIGHT
+                    for eid, weight in postings.items():
+                        if result is None or eid in result:
+                            term_scores[eid] += weight * idf * boost
+                if result is None:
+                    result = dict(term_scores)
+                else:
+                    result = {eid: s + term_scores[eid] for eid, s in result.items() if eid in term_scores}
+                if not result:
+                    break
+            return result
+
+    def search(self, query, limit=20, where=None):
+        """[(eventid, score)], best first; `where(eventid)` can narrow the matches."""
+        scores = self.scores(query).items()
+        if where is not None:
+            scores = [(eid, score) for eid, score in scores if where(eid)]
+        return heapq.nlargest(limit, scores, key=lambda x: (x[1], -x[0]))
+
+    def __len__(self):
+        return len(self._doc_words)
+
+    def stats(self):
+        with self._lock:
+            return {"events": len(self._doc_words), "words": len(self._vocab)}
+
+
+def highlight(text, query, width=None):
+    """
+    HTML-escaped text with words matching the query wrapped in <mark>. With
+    `width`, only about that many characters around the first match are kept.
+    """
+    text = text or ""
+    terms = tokenize(query)
+    spans = [m.span() for m in TOKEN_RE.finditer(text) if any(m.group().casefold().startswith(t) for t in terms)]
+    start, end = 0, len(text)
+    if width and len(text) > width:
+        first = spans[0][0] if spans else 0
+        start = max(0, min(first - width // 3, len(text) - width))
+        end = start + width
+    out, pos = [], start
+    for s, e in spans:
+        if s < start or e > end:
+            continue
+        out.append(escape(text[pos:s]))
+        out.append(Markup("<mark>%s</mark>") % text[s:e])
+        pos = e
+    out.append(escape(text[pos:end]))
+    return Markup("%s%s%s") % ("…" if start else "", Markup("").join(out), "…" if end < len(text) else "")
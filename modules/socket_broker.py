@@ -0,0 +1,109 @@
+"""
+Socket.IO client managers for running the app on several workers.
+
+SOCKETIO_MESSAGE_QUEUE selects the backend:
+    (unset)             in-process manager, single worker only
+    redis://host:6379   socketio.AsyncRedisManager (needs the `redis` package)
+    unix:///tmp/x.sock  UnixSocketManager against the local broker below
+
+Local broker stand-in (fans every line out to all connected workers):
+    python -m modules.socket_broker /tmp/sahyog-socketio.sock
+"""
+import asyncio
+import json
+import os
+import sys
+from urllib.parse import urlparse
+
+import socketio
+from socketio.async_pubsub_manager import AsyncPubSubManager
+
+
+class UnixSocketManager(AsyncPubSubManager):
+    """Pub/sub over newline-delimited JSON on a Unix domain socket."""
+    name = "unixsocket"
+
+    def __init__(self, url="unix:///tmp/sahyog-socketio.sock", channel="socketio", write_only=False, logger=None):
+        self.path = urlparse(url).path
+        self._writer = None
+        self._publish_lock = None
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    async def _publish(self, data):
+        if self._publish_lock is None:
+            self._publish_lock = asyncio.Lock()
+        line = (json.dumps({"channel": self.channel, "data": data}) + "\n").encode()
+        async with self._publish_lock:
+            for retries_left in (1, 0):
+                try:
+                    if self._writer is None or self._writer.is_closing():
+                        _, self._writer = await asyncio.open_unix_connection(self.path)
+                    self._writer.write(line)
+                    await self._writer.drain()
+                    return
+                except OSError as e:
+                    self._writer = None
+                    if not retries_left:
+                        self._get_logger().error(f"Cannot publish to broker at {self.path}: {e}")
+
+    async def _listen(self):
+        backoff = 1
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(self.path)
+            except OSError as e:
+                self._get_logger().error(f"Cannot reach broker at {self.path}: {e}, retrying in {backoff}s")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, 30)
+                continue
+            backoff = 1
+            try:
+                while line := await reader.readline():
+                    try:
+                        message = json.loads(line)
+                    except ValueError:
+                        continue
+                    if message.get("channel") == self.channel:
+                        yield message["data"]
+            finally:
+                writer.close()
+
+
+def make_client_manager(url=None, channel="sahyogsutra"):
+    """Returns a Socket.IO client manager for `url`, or None for the in-process default."""
+    if not url:
+        return None
+    scheme = urlparse(url).scheme
+    if scheme in ("redis", "rediss"):
+        return socketio.AsyncRedisManager(url, channel=channel)
+    if scheme == "unix":
+        return UnixSocketManager(url, channel=channel)
+    raise ValueError(f"Unsupported SOCKETIO_MESSAGE_QUEUE scheme: {scheme}")
+
+
+async def serve_broker(path):
+    clients = set()
+
+    async def handle(reader, writer):
+        clients.add(writer)
+        try:
+            while line := await reader.readline():
+                for client in list(clients):
+                    try:
+                        client.write(line)
+                    except Exception:
+                        clients.discard(client)
+        finally:
+            clients.discard(writer)
+            writer.close()
+
+    if os.path.exists(path):
+        os.remove(path)
+    server = await asyncio.start_unix_server(handle, path=path)
+    print(f"Socket.IO broker listening on {path}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve_broker(sys.argv[1] if len(sys.argv) > 1 else "/tmp/sahyog-socketio.sock"))
@@ -0,0 +1,204 @@
+"""
+On-disk persistence for the translation store.
+
+    translations.json          readable copy, the seed shipped with the repo
+    translations_backup.json   previous translations.json, kept when it is rewritten
+    translations.bin           pickle snapshot, loaded at startup instead of the JSON
+    translations.journal       one JSON line per translation added since the snapshot
+    translations.bin.lock      flock held while the journal or snapshot is written
+
+New translations are appended to the journal every few seconds, and only
+when there is something new. Compaction merges the snapshot on disk, the
+journal and this process's store into a new snapshot, written through a temp
+file and os.replace, then empties the journal. Every worker shares these
+files, so both happen under the file lock and no worker's journal lines are
+dropped. A crash at any point leaves either the old or the new file, and
+replaying the journal twice does no harm.
+
+The app only writes the snapshot and journal (both gitignored); the tracked
+translations.json is rewritten only with `write_json=True`, as
+translation_warmup does.
+"""
+import contextlib
+import fcntl
+import json
+import os
+import pickle
+import shutil
+import threading
+
+
+SNAPSHOT_FORMAT = 1
+
+
+def _atomic_write(path, write):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class TranslationFiles:
+    def __init__(self, store, json_path="translations.json", backup_path="translations_backup.json",
+                 snapshot_path="translations.bin", journal_path="translations.journal", compact_after=500,
+                 write_json=False):
+        self.store = store
+        self.json_path = json_path
+        self.write_json = write_json
+        self.backup_path = backup_path
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path
+        self.lock_path = f"{snapshot_path}.lock"
+        self.compact_after = compact_after
+
+        self._io_lock = threading.Lock()
+        self._journal_lines = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- Loading ---
+
+    def _read_snapshot(self):
+        """(translations, up to date): the snapshot, and whether translations.json is no newer."""
+        if not os.path.exists(self.snapshot_path):
+            return None, False
+        with open(self.snapshot_path, "rb") as f:
+            data = pickle.load(f)
+        if not (isinstance(data, tuple) and len(data) == 2 and data[0] == SNAPSHOT_FORMAT and isinstance(data[1], dict)):
+            return None, False
+        current = not (os.path.exists(self.json_path)
+                       and os.path.getmtime(self.json_path) > os.path.getmtime(self.snapshot_path))
+        return data[1], current
+
+    def _read_json(self):
+        if not os.path.exists(self.json_path):
+            return {}
+        with open(self.json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _read_saved(self):
+        """
+        (translations, source) from the snapshot, with translations.json laid
+        over it if that was replaced (deploy or manual edit) since.
+        """
+        try:
+            saved, current = self._read_snapshot()
+        except Exception as e:
+            print(f"Ignoring unreadable translation snapshot: {e}")
+            saved, current = None, False
+        if saved is None:
+            return self._read_json(), self.json_path
+        if not current:
+            for text, langs in self._read_json().items():
+                saved.setdefault(text, {}).update(langs)
+            return saved, f"{self.snapshot_path} and {self.json_path}"
+        return saved, self.snapshot_path
+
+    def _read_journal(self):
+        entries = []
+        if not os.path.exists(self.journal_path):
+            return entries
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    text, lang, translated = json.loads(line)
+                except ValueError:
+                    continue  # torn last line after a crash
+                entries.append((text, lang, translated))
+        return entries
+
+    def load(self):
+        """Loads snapshot (or JSON) plus the journal into the store; returns where it loaded from."""
+        with self._file_lock():
+            saved, source = self._read_saved()
+            journal = self._read_journal()
+        for text, lang, translated in journal:
+            saved.setdefault(text, {})[lang] = translated
+        self.store.load(saved)
+        self._journal_lines = len(journal)
+        return source
+
+    # --- Writing ---
+
+    @contextlib.contextmanager
+    def _file_lock(self):
+        """Excludes other processes sharing these files (other workers, translation_warmup)."""
+        with open(self.lock_path, "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _flush_locked(self):
+        pending = self.store.take_pending()
+        if not pending:
+            return 0
+        try:
+            with open(self.journal_path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in pending))
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception:
+            self.store.restore_pending(pending)
+            raise
+        self._journal_lines += len(pending)
+        return len(pending)
+
+    def flush(self):
+        """Appends translations added since the last flush to the journal; returns how many."""
+        with self._io_lock, self._file_lock():
+            return self._flush_locked()
+
+    def compact(self):
+        """
+        Folds the journal, including lines other workers appended, into a new
+        snapshot (and translations.json with write_json), then empties it.
+        """
+        with self._io_lock, self._file_lock():
+            self._flush_locked()
+            saved = self.store.snapshot()
+            on_disk, _ = self._read_saved()
+            for text, langs in on_disk.items():
+                saved.setdefault(text, {}).update(langs)
+            for text, lang, translated in self._read_journal():
+                saved.setdefault(text, {})[lang] = translated
+
+            _atomic_write(self.snapshot_path, lambda f: pickle.dump((SNAPSHOT_FORMAT, saved), f, protocol=pickle.HIGHEST_PROTOCOL))
+            if self.write_json:
+                if os.path.exists(self.json_path):
+                    backup_tmp = f"{self.backup_path}.{os.getpid()}.tmp"
+                    shutil.copyfile(self.json_path, backup_tmp)
+                    os.replace(backup_tmp, self.backup_path)
+                _atomic_write(self.json_path, lambda f: f.write(
+                    json.dumps(saved, indent=4, ensure_ascii=False).encode("utf-8")))
+                # The new JSON is newer than the snapshot; touch the snapshot so it stays the one loaded
+                os.utime(self.snapshot_path)
+            open(self.journal_path, "w").close()
+            self._journal_lines = 0
+
+    # --- Background writer ---
+
+    def run(self, interval=10):
+        while not self._stop.wait(interval):
+            try:
+                self.flush()
+                if self._journal_lines >= self.compact_after:
+                    self.compact()
+            except Exception as e:
+                print(f"Error saving translations: {e}")
+
+    def start(self, interval=10):
+        self._thread = threading.Thread(target=self.run, args=(interval,), name="TranslationFileThread", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stops the writer and compacts if anything was journaled (or no snapshot exists yet)."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        self.flush()
+        if self._journal_lines or not os.path.exists(self.snapshot_path):
+            self.compact()
@@ -0,0 +1,216 @@
+import collections
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+
+class GoogletransBackend:
+    """googletrans with one shared Translator, so its HTTP client and token are reused."""
+    def __init__(self):
+        self._translator = None
+        self._lock = threading.Lock()
+
+    def translate_batch(self, texts, lang):
+        from googletrans import Translator
+        with self._lock:
+            if self._translator is None:
+                self._translator = Translator()
+            # googletrans still sends one HTTP request per item, but over the same client and token
+            results = self._translator.translate(list(texts), dest=lang)
+        return [r.text for r in results]
+
+
+class FakeBackend:
+    """Offline backend for tests and local runs: marks the text with its language."""
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+
+    def translate_batch(self, texts, lang):
+        self.calls.append((lang, list(texts)))
+        if self.delay:
+            time.sleep(self.delay)
+        return [f"[{lang}] {t}" for t in texts]
+
+
+BACKENDS = {
+    "googletrans": GoogletransBackend,
+    "fake": FakeBackend,
+}
+
+
+def make_backend(name=None):
+    name = name or os.environ.get("TRANSLATION_BACKEND", "googletrans")
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown TRANSLATION_BACKEND: {name}") from None
+
+
+class TranslationService:
+    """
+    Fills the translation store from a backend.
+    Identical (text, lang) requests share one Future while in flight, queued
+    strings are grouped per language and sent as one batch, and a failed
+    string is not retried for `retry_after` seconds.
+    """
+    def __init__(self, store, backend, workers=2, max_batch=50, window=0.05, retry_after=60):
+        self.store = store
+        self.backend = backend
+        self.workers = workers
+        self.max_batch = max_batch
+        self.window = window
+        self.retry_after = retry_after
+
+        self._cond = threading.Condition()
+        self._queues = collections.OrderedDict()  # lang -> [text, ...]
+        self._inflight = {}  # (text, lang) -> [Future, save_file, store]
+        self._failed = {}  # (text, lang) -> monotonic time of failure
+        self._threads = []
+        self._started = 0
+        self._stopping = False
+
+        self._counts = collections.Counter()
+
+    def _start_locked(self):
+        """Starts workers up to `workers`, replacing any that died."""
+        if self._stopping:
+            return
+        self._threads = [t for t in self._threads if t.is_alive()]
+        for _ in range(self.workers - len(self._threads)):
+            t = threading.Thread(target=self._worker, name=f"translate-{self._started}", daemon=True)
+            self._started += 1
+            t.start()
+            self._threads.append(t)
+
+    def request(self, text, lang, save_file=True, store=True):
+        """
+        Queues text for translation unless it is already queued; returns its
+        Future. With store=False the result is only handed to the Future and
+        never added to the translation store.
+        """
+        key = (text, lang)
+        cached = self.store.get(text, lang)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+        with self._cond:
+            entry = self._inflight.get(key)
+            if entry:
+                entry[1] = entry[1] or (save_file and store)
+                entry[2] = entry[2] or store
+                self._counts["coalesced"] += 1
+                return entry[0]
+            future = Future()
+            failed_at = self._failed.get(key)
+            if failed_at is not None and time.monotonic() - failed_at < self.retry_after:
+                future.set_result(None)
+                return future
+            self._inflight[key] = [future, save_file and store, store]
+            self._queues.setdefault(lang, []).append(text)
+            self._counts["requested"] += 1
+            self._start_locked()
+            self._cond.notify()
+            return future
+
+    def translate_many(self, texts, lang, save_file=True, timeout=None):
+        """Blocking helper: returns translations in order, None where translation failed."""
+        futures = [self.request(t, lang, save_file) for t in texts]
+        return [None if f.exception(timeout) else f.result() for f in futures]
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queues and not self._stopping:
+                self._cond.wait()
+            if not self._queues:
+                return None, []
+        # Let concurrent misses from the same page land in this batch
+        time.sleep(self.window)
+        with self._cond:
+            if not self._queues:
+                return None, []
+            lang, texts = next(iter(self._queues.items()))
+            batch, rest = texts[:self.max_batch], texts[self.max_batch:]
+            if rest:
+                self._queues[lang] = rest
+                self._queues.move_to_end(lang)
+            else:
+                del self._queues[lang]
+            return lang, batch
+
+    def _worker(self):
+        while True:
+            lang, texts = self._next_batch()
+            if lang is None:
+                return
+            with self._cond:
+                futures = [self._inflight[(t, lang)][0] for t in texts]
+            # A running Future can no longer be cancelled, so settling it below cannot raise
+            futures = [f if f.set_running_or_notify_cancel() else None for f in futures]
+            try:
+                results = self._translate_batch(lang, texts)
+            except Exception as e:
+                print(f"Translation worker error ({lang}, {len(texts)} texts): {e}")
+                with self._cond:
+                    for t in texts:
+                        self._inflight.pop((t, lang), None)
+                for future in futures:
+                    if future is not None:
+                        future.set_exception(e)
+                continue
+            for future, result in zip(futures, results):
+                if future is not None:
+                    future.set_result(result)
+
+    def _translate_batch(self, lang, texts):
+        """Translates one batch and stores the results; returns them, None for each text on failure."""
+        try:
+            translated = self.backend.translate_batch(texts, lang)
+            if len(translated) != len(texts):
+                raise ValueError(f"backend returned {len(translated)} results for {len(texts)} texts")
+            error = None
+        except Exception as e:
+            translated, error = [None] * len(texts), e
+            print(f"Translation error ({lang}, {len(texts)} texts): {e}")
+
+        with self._cond:
+            entries = [self._inflight.pop((t, lang)) for t in texts]
+            now = time.monotonic()
+            if len(self._failed) > 10000:
+                self._failed = {k: v for k, v in self._failed.items() if now - v < self.retry_after}
+            for t in texts:
+                if error:
+                    self._failed[(t, lang)] = now
+                else:
+                    self._failed.pop((t, lang), None)
+            self._counts["batches"] += 1
+            self._counts["failed" if error else "translated"] += len(texts)
+
+        if not error:
+            saved = [(t, lang, r) for t, r, e in zip(texts, translated, entries) if e[1]]
+            volatile = [(t, lang, r) for t, r, e in zip(texts, translated, entries) if e[2] and not e[1]]
+            self.store.add_many(saved, save_file=True)
+            self.store.add_many(volatile, save_file=False)
+        return translated
+
+    def shutdown(self, wait=False):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        if wait:
+            for t in self._threads:
+                t.join()
+
+    def stats(self):
+        with self._cond:
+            return {
+                "queued": sum(len(v) for v in self._queues.values()),
+                "in_flight": len(self._inflight),
+                "requested": self._counts["requested"],
+                "coalesced": self._counts["coalesced"],
+                "batches": self._counts["batches"],
+                "translated": self._counts["translated"],
+                "failed": self._counts["failed"],
+            }
@@ -0,0 +1,112 @@
+"""
+Fills translations.json ahead of deploy so no language warms up on live traffic.
+
+    python -m modules.translation_warmup              translate every gap
+    python -m modules.translation_warmup --dry-run    only report coverage
+    python -m modules.translation_warmup --langs hi,ta --backend fake
+
+Collects every literal translate("...") in templates/*.html plus the category
+and event type names in events.json, and checks them against the store for
+each language offered in selectlanguage.html. Missing strings are sent in
+batches through the TranslationService, then compacted into translations.json
+along with what the app has journaled. The files are shared under a file lock,
+so it can run while the app is up; workers load the result on their next start.
+"""
+import argparse
+import glob
+import json
+import re
+
+from jinja2 import Environment, nodes
+
+from .translations import TranslationStore, normalize_text
+from .translation_files import TranslationFiles
+from .translation_service import TranslationService, make_backend
+
+
+def template_strings(pattern="templates/*.html"):
+    """Literal first arguments of translate(...) calls, parsed with Jinja itself."""
+    env = Environment()
+    found = set()
+    for path in sorted(glob.glob(pattern)):
+        with open(path, encoding="utf-8") as f:
+            ast = env.parse(f.read())
+        for call in ast.find_all(nodes.Call):
+            if isinstance(call.node, nodes.Name) and call.node.name == "translate" and call.args:
+                if isinstance(call.args[0], nodes.Const) and isinstance(call.args[0].value, str):
+                    found.add(normalize_text(call.args[0].value))
+    found.discard("")
+    return found
+
+
+def category_strings(path="events.json"):
+    with open(path, encoding="utf-8") as f:
+        categories = json.load(f)
+    found = set()
+    for group, events in categories.items():
+        found.add(normalize_text(group))
+        found.update(normalize_text(e) for e in events)
+    return found
+
+
+def offered_languages(path="templates/selectlanguage.html"):
+    with open(path, encoding="utf-8") as f:
+        langs = re.findall(r'data-lang="([a-z-]+)"', f.read())
+    return [lang for lang in dict.fromkeys(langs) if lang != "en"]
+
+
+def coverage(store, strings, langs):
+    """{lang: (translated, total, [missing...])}"""
+    report = {}
+    for lang in langs:
+        missing = sorted(t for t in strings if store.get(t, lang) is None)
+        report[lang] = (len(strings) - len(missing), len(strings), missing)
+    return report
+
+
+def print_coverage(report, title):
+    print(title)
+    for lang, (done, total, _) in report.items():
+        pct = 100.0 * done / total if total else 100.0
+        print(f"  {lang:>5}  {done:>5}/{total:<5} {pct:6.1f}%")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--langs", help="comma separated codes (default: all in selectlanguage.html)")
+    parser.add_argument("--backend", help="translation backend (default: TRANSLATION_BACKEND or googletrans)")
+    parser.add_argument("--batch", type=int, default=50, help="strings per upstream call")
+    parser.add_argument("--dry-run", action="store_true", help="report coverage without translating")
+    args = parser.parse_args(argv)
+
+    strings = template_strings() | category_strings()
+    langs = args.langs.split(",") if args.langs else offered_languages()
+
+    store = TranslationStore()
+    files = TranslationFiles(store, write_json=True)
+    print(f"Loaded translations from {files.load()}; {len(strings)} strings, languages: {', '.join(langs)}")
+
+    before = coverage(store, strings, langs)
+    print_coverage(before, "Coverage before:")
+    if args.dry_run or all(not missing for _, _, missing in before.values()):
+        return 0
+
+    service = TranslationService(store, make_backend(args.backend), workers=1, max_batch=args.batch, window=0)
+    failed = 0
+    for lang, (_, _, missing) in before.items():
+        if not missing:
+            continue
+        print(f"Translating {len(missing)} strings to {lang}...")
+        results = service.translate_many(missing, lang)
+        failed += sum(r is None for r in results)
+    service.shutdown(wait=True)
+
+    files.compact()
+    print_coverage(coverage(store, strings, langs), "Coverage after:")
+    if failed:
+        print(f"{failed} strings could not be translated; run again to retry them")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,87 @@
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+
+
+@lru_cache(maxsize=16384)
+def normalize_text(text):
+    """Drops newlines and collapses runs of whitespace, as translation keys are stored."""
+    return " ".join(text.replace("\n", "").split())
+
+
+class TranslationStore:
+    """
+    Holds the translations persisted to translations.json (`saved`) and the
+    ones kept in memory only (`volatile`), plus a flat read-only lookup
+    keyed by (text, lang). Readers use the current table without locking;
+    writers build a new table under the lock and swap it in, bumping
+    `version` so caches built from translations know to refresh. Saved
+    additions are also queued until TranslationFiles takes them.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.saved = {}
+        self.volatile = {}
+        self._table = MappingProxyType({})
+        self._pending = []
+        self.version = 0
+
+    def _swap_locked(self, table):
+        self._table = MappingProxyType(table)
+        self.version += 1
+
+    def load(self, saved):
+        with self._lock:
+            self.saved = saved
+            table = {}
+            for source in (self.saved, self.volatile):  # volatile wins, as before
+                for text, langs in source.items():
+                    for lang, translated in langs.items():
+                        table[(text, lang)] = translated
+            self._swap_locked(table)
+
+    def get(self, text, lang, default=None):
+        return self._table.get((text, lang), default)
+
+    def __contains__(self, key):
+        return key in self._table
+
+    def add_many(self, items, save_file=True):
+        """Adds (text, lang, translated) triples in one table swap."""
+        if not items:
+            return
+        with self._lock:
+            target = self.saved if save_file else self.volatile
+            table = dict(self._table)
+            for text, lang, translated in items:
+                target.setdefault(text, {})[lang] = translated
+                if save_file:
+                    self._pending.append((text, lang, translated))
+                if save_file and (text, lang) in table and lang in self.volatile.get(text, {}):
+                    continue  # an in-memory translation still takes precedence
+                table[(text, lang)] = translated
+            self._swap_locked(table)
+
+    def add(self, text, lang, translated, save_file=True):
+        self.add_many([(text, lang, translated)], save_file)
+
+    def take_pending(self):
+        """Saved translations added since the last call, for the journal."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+            return pending
+
+    def restore_pending(self, items):
+        with self._lock:
+            self._pending[:0] = items
+
+    def snapshot(self):
+        """Copy of the saved translations, safe to serialize outside the lock."""
+        with self._lock:
+            return {text: dict(langs) for text, langs in self.saved.items()}
+
+    def __len__(self):
+        return len(self._table)
+
+
+translation_store = TranslationStore()
@@ -65,15 +65,6 @@ function togglePasswordVisibility(id) {
     if (field) field.type = field.type === 'password' ? 'text' : 'password';
 }
 
-function filterCampaigns(searchInput) {
-    const filter = searchInput.value.toLowerCase();
-    const categoryWrapper = searchInput.closest('.campaign-category-wrapper');
-    if (!categoryWrapper) return;
-    categoryWrapper.querySelectorAll('.campaign-card').forEach(card => {
-        card.classList.toggle('search-hidden', !card.innerText.toLowerCase().includes(filter));
-    });
-}
-
 // --- Event Actions ---
 function declineEvent(eventId) {
     // Uses translation from global config
@@ -198,7 +189,13 @@ async function loadContent(type, url, loadingId, contentId, retryFn) {
 
 const loadCampaigns = () => loadContent('campaigns', '/show_campaigns', '#campaignsLoadingState', '#campaignsContent', 'loadCampaigns()');
 const loadAddForm = () => loadContent('addForm', '/show_add_form', '#addFormLoadingState', '#addFormContent', 'loadAddForm()');
-const loadPendingEvents = () => loadContent('pending', '/show_pending_events', '#pendingLoadingState', '#pendingContent', 'loadPendingEvents()');
+let pendingAfter = 0; // last event id before the pending page on screen
+const loadPendingEvents = () => loadContent('pending', `/show_pending_events?after=${pendingAfter}`, '#pendingLoadingState', '#pendingContent', 'loadPendingEvents()');
+function loadPendingPage(after) {
+    pendingAfter = after;
+    contentLoaders.pending.loaded = false;
+    loadPendingEvents();
+}
 
 // --- Initialization Logic ---
 function initializeCampaignListeners() {
@@ -211,7 +208,11 @@ function initializeCampaignListeners() {
         allCategoryWrappers.forEach(wrapper => {
             const show = wrapper.dataset.categoryId === categoryIdToShow;
             wrapper.style.display = show ? 'block' : 'none';
-            if (show) wrapper.querySelectorAll('.campaign-card.hidden').forEach(c => c.classList.remove('hidden'));
+            if (show) {
+                wrapper.classList.add('expanded');
+                wrapper.querySelectorAll('.campaign-card.hidden').forEach(c => c.classList.remove('hidden'));
+                window.loadSectionPage?.(wrapper);
+            }
         });
         backToAllBtn.style.display = 'block';
         campaignsSection.scrollIntoView({ behavior: 'smooth' });
@@ -219,6 +220,7 @@ function initializeCampaignListeners() {
     backToAllBtn?.addEventListener('click', () => {
         allCategoryWrappers.forEach(w => {
             w.style.display = 'block';
+            w.classList.remove('expanded');
             w.querySelectorAll('.campaign-card').forEach((c, i) => i >= 4 && c.classList.add('hidden'));
         });
         backToAllBtn.style.display = 'none';
@@ -245,7 +247,42 @@ function initializeAddFormListeners() {
 }
 
 function initializePendingListeners() {
-    $$('.approve-btn').forEach(btn => {
+    const selectAll = $('#pendingSelectAll');
+    const boxes = $$('.pending-select');
+    const bulkButtons = [$('#bulkApproveBtn'), $('#bulkDeclineBtn')];
+    const selectedIds = () => [...boxes].filter(b => b.checked).map(b => Number(b.value));
+    const updateBulk = () => bulkButtons.forEach(b => { if (b) b.disabled = selectedIds().length === 0; });
+    boxes.forEach(b => b.addEventListener('change', updateBulk));
+    selectAll?.addEventListener('change', () => { boxes.forEach(b => { b.checked = selectAll.checked; }); updateBulk(); });
+
+    const bulkAction = async (url, payload) => {
+        bulkButtons.forEach(b => { b.disabled = true; });
+        try {
+            const response = await fetch(url, {
+                method: 'POST',
+                headers: { 'Content-Type': 'application/json' },
+                body: JSON.stringify(payload)
+            });
+            const result = await response.json();
+            if (!response.ok) throw new Error(result.error || response.statusText);
+            const done = Object.keys(result.approved || result.declined || []).length;
+            const skipped = Object.entries(result.skipped || {}).map(([id, why]) => `${id}: ${why}`);
+            showAlert(`${done} ${result.approved ? 'approved' : 'declined'}` + (skipped.length ? `, skipped ${skipped.join(', ')}` : ''), skipped.length ? 'info' : 'success');
+            loadPendingPage(pendingAfter);
+        } catch (error) {
+            console.error('Error:', error);
+            showAlert(error.message || SAHYOG_CONFIG.trans.errorOccurred, 'error');
+            updateBulk();
+        }
+    };
+    $('#bulkApproveBtn')?.addEventListener('click', () => bulkAction('/admin/pending/approve', { eventids: selectedIds() }));
+    $('#bulkDeclineBtn')?.addEventListener('click', () => {
+        const reason = prompt(SAHYOG_CONFIG.trans.declineReason);
+        if (!reason || !reason.trim()) { showAlert(SAHYOG_CONFIG.trans.declineCancelled, 'info'); return; }
+        bulkAction('/admin/pending/decline', { eventids: selectedIds(), reason: reason.trim() });
+    });
+
+    $$('.event-row .approve-btn').forEach(btn => {
         btn.addEventListener('click', e => {
             e.preventDefault();
             const row = btn.closest('tr');
@@ -254,7 +291,7 @@ function initializePendingListeners() {
             btn.disabled = true;
             btn.textContent = SAHYOG_CONFIG.trans.processing;
             const formData = new FormData();
-            row.querySelectorAll('input, select, textarea').forEach(input => {
+            row.querySelectorAll('input[name], select, textarea').forEach(input => {
                 formData.append(input.name, input.value);
             });
             fetch('/addevent', { method: 'POST', body: formData })
@@ -270,7 +307,7 @@ function initializePendingListeners() {
                     showAlert(text, isSuccess ? 'success' : 'info');
                     if (isSuccess) {
                         row.style.opacity = '0';
-                        setTimeout(() => { contentLoaders.pending.loaded = false; loadPendingEvents(); }, 1000);
+                        setTimeout(() => loadPendingPage(pendingAfter), 1000);
                     } else {
                         btn.disabled = false;
                         btn.textContent = originalText;
@@ -353,17 +390,8 @@ function initCalendar() {
     calendar = new FullCalendar.Calendar(calendarEl, {
         initialView: 'dayGridMonth',
         headerToolbar: { left: 'prev,next today', center: 'title', right: 'dayGridMonth,listWeek' },
-        events: function (info, successCallback, failureCallback) {
-            fetch('/api').then(r => r.json()).then(data => {
-                const events = data['active events'].map(e => ({
-                    title: e.eventname,
-                    start: e.eventstartdate + (e.eventstarttime ? 'T' + e.eventstarttime : ''),
-                    url: '#',
-                    extendedProps: { description: e.description, location: e.location }
-                }));
-                successCallback(events);
-            }).catch(failureCallback);
-        },
+        // Only the visible range is fetched; unchanged ranges come back as 304
+        events: '/calendar/events',
         eventClick: function (info) {
             info.jsEvent.preventDefault();
             showAlert(`${info.event.title}\n📍 ${info.event.extendedProps.location}\n📅 ${info.event.start.toLocaleDateString()}`, 'info');
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tests import local_db  # noqa: E402
+
+TEST_DIR = tempfile.mkdtemp(prefix="sahyog-tests-")
+TEST_DB = os.path.join(TEST_DIR, "test.db")
+os.environ["SQLITECLOUD"] = TEST_DB
+os.environ["TRANSLATION_BACKEND"] = "fake"
+local_db.use_sqlite(TEST_DB)
+local_db.create(TEST_DB)
+
+
+@pytest.fixture
+def cursor(tmp_path):
+    """A cursor on a fresh, migrated database of its own."""
+    from modules import migrate
+    path = str(tmp_path / "db.sqlite")
+    local_db.create(path)
+    db = local_db.connect(path)
+    c = db.cursor()
+    migrate(c)
+    yield c
+    db.close()
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    """The app module, imported from the repo root (templates and static are relative paths)."""
+    os.chdir(ROOT)
+    import app
+    return app
+
+
+def serve(app, lifespan="off"):
+    """Runs `app` with uvicorn in a thread; returns (base url, server)."""
+    import socket
+    import threading
+    import time
+    import uvicorn
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, lifespan=lifespan, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    for _ in range(100):
+        if server.started:
+            break
+        time.sleep(0.05)
+    return f"http://127.0.0.1:{port}", server
+
+
+@pytest.fixture(scope="session")
+def base_url(app_module):
+    """The app served without its lifespan (no migrations, background loops or translation files)."""
+    url, server = serve(app_module.app)
+    yield url
+    server.should_exit = True
@@ -0,0 +1,47 @@
+"""
+Runs the app against a local SQLite file in place of SQLiteCloud, for tests.
+use_sqlite() swaps the driver's connect before app is imported.
+"""
+import sqlite3
+
+import sqlitecloud
+
+
+SCHEMA = """
+CREATE TABLE userdetails(username TEXT PRIMARY KEY, password TEXT, name TEXT, email TEXT, role TEXT DEFAULT 'user', events TEXT, likes TEXT);
+CREATE TABLE eventdetail(eventid INTEGER PRIMARY KEY AUTOINCREMENT, eventname TEXT, email TEXT, eventstarttime TEXT, eventendtime TEXT,
+    eventstartdate TEXT, eventenddate TEXT, location TEXT, category TEXT, description TEXT, username TEXT, likes INTEGER DEFAULT 0);
+CREATE TABLE eventreq(eventid INTEGER PRIMARY KEY AUTOINCREMENT, eventname TEXT, email TEXT, eventstarttime TEXT, eventendtime TEXT,
+    eventstartdate TEXT, eventenddate TEXT, location TEXT, category TEXT, description TEXT, username TEXT);
+CREATE TABLE endedevent(eventid INTEGER, eventname TEXT, email TEXT, eventstarttime TEXT, eventendtime TEXT, eventstartdate TEXT,
+    eventenddate TEXT, location TEXT, category TEXT, description TEXT, username TEXT, likes INTEGER);
+CREATE TABLE messages(eventid INTEGER, msg TEXT);
+CREATE TABLE messages2(eventid INTEGER, msgs TEXT);
+INSERT INTO userdetails(username, password, name, email, role) VALUES
+    ('admin', 'pw', 'Admin', 'a@x', 'admin'),
+    ('bob', 'pw', 'Bob', 'b@x', 'user');
+INSERT INTO eventdetail(eventname, email, eventstarttime, eventendtime, eventstartdate, eventenddate, location, category, description, username, likes) VALUES
+    ('Tree Plantation', 'a@x', '10:00', '12:00', '2030-01-10', '2030-01-10', 'Park', 'Tree Plantation', 'Plant trees', 'admin', 0),
+    ('Blood Camp', 'b@x', '09:00', '17:00', '2030-02-01', '2030-02-02', 'Center', 'Blood Donation', 'Donate blood', 'bob', 0);
+INSERT INTO messages2 VALUES (1, "[('bob', 'hi', '2025-01-01 10:00:00')]");
+"""
+
+
+def connect(path):
+    # Autocommit like SQLiteCloud: every statement commits unless a BEGIN is open
+    db = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+    db.row_factory = sqlite3.Row
+    return db
+
+
+def create(path):
+    """A fresh database at `path` with two users and two events."""
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+    db.commit()
+    db.close()
+
+
+def use_sqlite(path):
+    sqlitecloud.connect = lambda *args, **kwargs: connect(path)
+    sqlitecloud.Row = sqlite3.Row
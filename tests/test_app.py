@@ -0,0 +1,96 @@
+import requests
+
+
+def test_busy_db_returns_503_with_retry_after(app_module, base_url, monkeypatch):
+    monkeypatch.setattr(app_module.db_executor, "saturated", lambda: True)
+    response = requests.get(f"{base_url}/show_pending_events")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "2"
+    assert "Server is busy" in response.text
+
+
+def test_http_errors_render_the_error_page(base_url):
+    response = requests.get(f"{base_url}/no/such/page")
+    assert response.status_code == 404
+
+
+def test_calendar_feed_revalidates_against_any_listed_etag(base_url):
+    url = f"{base_url}/calendar/events?start=2025-01-01&end=2025-02-01"
+    etag = requests.get(url).headers["ETag"]
+    assert requests.get(url, headers={"If-None-Match": etag}).status_code == 304
+    assert requests.get(url, headers={"If-None-Match": f'"stale", {etag}'}).status_code == 304
+    assert requests.get(url, headers={"If-None-Match": "*"}).status_code == 304
+    assert requests.get(url, headers={"If-None-Match": '"stale"'}).status_code == 200
+
+
+def test_translate_event_timeout_leaves_the_shared_translation_running(app_module, base_url, monkeypatch):
+    monkeypatch.setattr(app_module.translation_service.backend, "delay", 0.5)
+    monkeypatch.setattr(app_module, "TRANSLATE_EVENT_TIMEOUT", 0.001)  # still queued, not yet running
+    payload = {"eventid": 1, "eventname": "Shared slow text"}
+    assert requests.post(f"{base_url}/translate_event", json=payload).status_code == 504
+
+    monkeypatch.setattr(app_module, "TRANSLATE_EVENT_TIMEOUT", 5)
+    response = requests.post(f"{base_url}/translate_event", json=payload)
+    assert response.status_code == 200
+    assert response.json() == {"eventname": "[en] Shared slow text"}
+
+
+def test_waiting_for_a_connection_does_not_hold_a_db_worker(app_module, monkeypatch):
+    import asyncio
+    from modules.db_executor import BoundedExecutor
+    from modules.db_pool import ConnectionPool
+
+    pool = ConnectionPool(app_module._sync_get_db_conn, max_size=1, acquire_timeout=2)
+    monkeypatch.setattr(app_module, "db_pool", pool)
+    monkeypatch.setattr(app_module, "db_executor", BoundedExecutor(max_workers=1))
+
+    async def handler():
+        async with app_module.open_db() as db:
+            await asyncio.sleep(0.2)  # the other request now waits for the only connection
+            return (await db.query_one("SELECT COUNT(*) AS n FROM userdetails"))["n"]
+
+    async def other_request():
+        await asyncio.sleep(0.05)
+        return (await app_module.run_query("SELECT 1 AS one", fetchmode="one"))["one"]
+
+    async def both():
+        return await asyncio.gather(handler(), other_request())
+    assert asyncio.run(both()) == [2, 1]
+    assert pool.stats()["timeouts"] == 0
+    pool.close()
+
+
+def test_otp_mail_is_queued_not_sent_in_the_request(app_module, base_url, monkeypatch):
+    import threading
+    import time
+
+    sent = threading.Event()
+
+    def slow_send(params):
+        time.sleep(1)
+        assert params["to"] == "new@x"
+        sent.set()
+    monkeypatch.setattr(app_module.notifier, "_send_mail", slow_send)
+    started = time.monotonic()
+    response = requests.post(f"{base_url}/sendsignupotp", data={"email": "new@x"})
+    assert response.status_code == 200 and "OTP Sent" in response.text
+    assert time.monotonic() - started < 0.8
+    assert sent.wait(5)
+
+
+def test_liking_a_missing_event_is_refused(base_url):
+    import socketio
+    from modules import migrate
+    from tests import local_db
+    from tests.conftest import TEST_DB
+
+    db = local_db.connect(TEST_DB)
+    migrate(db.cursor())
+    client = socketio.Client()
+    client.connect(base_url, transports=["polling"])
+    try:
+        assert client.call("addeventlike", {"eventid": 999, "byuser": "bob", "type": "add"}) == {"error": "Event not found"}
+    finally:
+        client.eio.disconnect(abort=True)
+    assert db.execute("SELECT COUNT(*) FROM event_likes WHERE eventid=999").fetchone()[0] == 0
+    db.close()
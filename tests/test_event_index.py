@@ -0,0 +1,64 @@
+from modules.event_index import EventIndex
+
+
+def event(eventid, username, likes=0):
+    return {"eventid": eventid, "eventname": f"Event {eventid}", "username": username, "likes": likes,
+            "category": "Tree Plantation", "location": "Park", "description": "",
+            "eventstartdate": "2030-01-01", "eventenddate": "2030-01-01", "eventstarttime": "10:00", "eventendtime": "11:00"}
+
+
+def test_like_moves_the_likes_leaderboard():
+    index = EventIndex()
+    index.load([event(1, "ann", likes=2), event(2, "bob", likes=1)])
+    assert index.top_organizers(by="likes") == [("ann", 2), ("bob", 1)]
+
+    index.set_likes(2, 5)
+    assert index.top_organizers(by="likes") == [("bob", 5), ("ann", 2)]
+
+    index.set_likes(2, 4)
+    assert index.top_organizers(by="likes") == [("bob", 4), ("ann", 2)]
+
+
+def test_discard_after_like_leaves_no_negative_total():
+    index = EventIndex()
+    index.load([event(1, "ann"), event(2, "ann")])
+    index.set_likes(1, 3)
+    index.discard(1)
+    assert index.top_organizers(by="likes") == []  # zero totals are not listed
+    assert index.top_organizers(by="events") == [("ann", 1)]
+    index.discard(2)
+    assert index.top_organizers(by="likes") == []
+    assert index.top_organizers(by="events") == []
+
+
+class StaleSelect:
+    """A cursor whose SELECT returns `rows` as read before `during()` ran."""
+    def __init__(self, rows, during=None):
+        self.rows, self.during = rows, during
+
+    def execute(self, query):
+        if self.during:
+            self.during()
+        return self
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_reload_keeps_writes_that_land_during_its_select():
+    index = EventIndex()
+    index.load([event(1, "ann"), event(2, "bob")])
+
+    def writes():
+        index.upsert(event(3, "ann"))
+        index.discard(1)
+        index.set_likes(2, 7)
+    index.load_from(StaleSelect([event(1, "ann"), event(2, "bob")], writes))
+
+    assert index.get(1) is None
+    assert index.get(3) is not None
+    assert index.get(2)["likes"] == 7
+    assert index.top_organizers(by="likes") == [("bob", 7)]
+
+    index.load_from(StaleSelect([event(2, "bob")]))  # nothing left to replay
+    assert [r["eventid"] for r in index.all()] == [2]
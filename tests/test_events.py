@@ -0,0 +1,85 @@
+from modules import add_event, delete_event
+from modules.add_event import addevent
+from modules.delete_event import delete_eventfromid
+
+FORM = {"eventname": "River Cleanup", "email": "b@x", "eventstarttime": "10:00", "eventendtime": "11:00",
+        "eventstartdate": "2031-05-01", "eventenddate": "2031-05-01", "location": "Ghat",
+        "category": "Cleanliness Drive", "description": "Clean the river bank"}
+
+
+def count(c, query):
+    return c.execute(query).fetchone()[0]
+
+
+def test_addevent_commits_event_and_mail_together(cursor):
+    assert addevent(cursor, FORM, "bob") == "Event added!"
+    assert count(cursor, "SELECT COUNT(*) FROM eventdetail WHERE eventname='River Cleanup'") == 1
+    assert count(cursor, "SELECT COUNT(*) FROM mail_outbox") == 1
+
+
+def test_addevent_rolls_back_when_the_mail_cannot_be_queued(cursor, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("outbox down")
+    monkeypatch.setattr(add_event, "enqueue_mail", broken)
+    assert addevent(cursor, FORM, "bob").startswith("Error adding event")
+    assert count(cursor, "SELECT COUNT(*) FROM eventdetail WHERE eventname='River Cleanup'") == 0
+    assert count(cursor, "SELECT COUNT(*) FROM event_owners WHERE username='bob'") == 1  # only the seeded event
+
+
+def test_delete_moves_event_and_queues_mail(cursor):
+    assert delete_eventfromid(cursor, 2, {"username": "bob"}) == "REDIRECT_HOME"
+    assert count(cursor, "SELECT COUNT(*) FROM eventdetail WHERE eventid=2") == 0
+    assert count(cursor, "SELECT COUNT(*) FROM endedevent WHERE eventid=2") == 1
+    assert count(cursor, "SELECT COUNT(*) FROM mail_outbox") == 1
+
+
+def test_failed_delete_keeps_the_event(cursor, monkeypatch):
+    def broken(*args, **kwargs):
+        raise RuntimeError("outbox down")
+    monkeypatch.setattr(delete_event, "enqueue_mail", broken)
+    assert delete_eventfromid(cursor, 2, {"username": "bob"}).startswith("Error")
+    assert count(cursor, "SELECT COUNT(*) FROM eventdetail WHERE eventid=2") == 1
+    assert count(cursor, "SELECT COUNT(*) FROM endedevent") == 0
+
+
+def test_index_follows_only_committed_changes(cursor, monkeypatch):
+    from modules import event_index
+    event_index.load_from(cursor)
+    assert addevent(cursor, FORM, "bob") == "Event added!"
+    assert any(e["eventname"] == "River Cleanup" for e in event_index.all())
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("outbox down")
+    monkeypatch.setattr(add_event, "enqueue_mail", broken)
+    assert addevent(cursor, dict(FORM, eventname="Ghost Event"), "bob").startswith("Error")
+    assert not any(e["eventname"] == "Ghost Event" for e in event_index.all())
+
+    monkeypatch.setattr(delete_event, "enqueue_mail", broken)
+    assert delete_eventfromid(cursor, 2, {"username": "bob"}).startswith("Error")
+    assert event_index.get(2) is not None
+    monkeypatch.undo()
+    assert delete_eventfromid(cursor, 2, {"username": "bob"}) == "REDIRECT_HOME"
+    assert event_index.get(2) is None
+
+
+def test_expire_events_waits_for_a_concurrent_writer(cursor):
+    import threading
+    import time
+    from modules import event_index, expire_events
+    from tests import local_db
+
+    event_index.load_from(cursor)
+    path = cursor.execute("PRAGMA database_list").fetchone()["file"]
+    other = local_db.connect(path)
+    other.execute("BEGIN IMMEDIATE")
+    other.execute("UPDATE mail_outbox SET status='pending'")
+    threading.Timer(0.3, lambda: other.execute("COMMIT")).start()
+
+    started = time.monotonic()
+    ended = expire_events(cursor, 2**40)
+    assert time.monotonic() - started >= 0.25
+    assert sorted(e["eventid"] for e in ended) == [1, 2]
+    assert count(cursor, "SELECT COUNT(*) FROM eventdetail") == 0
+    assert count(cursor, "SELECT COUNT(*) FROM mail_outbox WHERE idempotency_key LIKE 'event-ended:%'") == 2
+    assert len(event_index) == 0
+    other.close()
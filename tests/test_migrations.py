@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from modules import migrations
+from modules.migrations import migrate
+from tests import local_db
+
+
+def fresh_db(tmp_path):
+    path = str(tmp_path / "db.sqlite")
+    local_db.create(path)
+    return path
+
+
+def test_workers_migrating_together_copy_chat_once(tmp_path):
+    path = fresh_db(tmp_path)
+    errors = []
+
+    def worker():
+        db = local_db.connect(path)
+        try:
+            migrate(db.cursor())
+        except Exception as e:
+            errors.append(e)
+        finally:
+            db.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    c = local_db.connect(path).cursor()
+    assert c.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0] == 1
+    assert c.execute("SELECT COUNT(*) FROM schema_migrations").fetchone()[0] == len(migrations.MIGRATIONS)
+
+
+def test_failed_migration_rolls_back_and_reruns_cleanly(tmp_path, monkeypatch):
+    path = fresh_db(tmp_path)
+    c = local_db.connect(path).cursor()
+
+    def crash(c):
+        migrations._chat_messages(c)
+        raise RuntimeError("worker killed")
+    monkeypatch.setattr(migrations, "MIGRATIONS", [(n, crash if n == "0002_chat_messages" else fn)
+                                                   for n, fn in migrations.MIGRATIONS])
+    with pytest.raises(RuntimeError):
+        migrate(c)
+    assert [r["name"] for r in c.execute("SELECT name FROM schema_migrations")] == ["0001_event_likes_owners"]
+
+    monkeypatch.undo()
+    migrate(c)
+    assert c.execute("SELECT COUNT(*) FROM chat_messages").fetchone()[0] == 1
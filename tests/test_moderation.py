@@ -0,0 +1,63 @@
+import pytest
+
+from modules import approve_requests, decline_requests, event_index
+from modules import moderation
+
+REQUEST = ("eventname, email, eventstarttime, eventendtime, eventstartdate, eventenddate, location, category, description, username",
+           "'{name}', 'b@x', '10:00', '11:00', '2031-01-01', '2031-01-01', 'Town', 'Blood Donation', 'd', 'bob'")
+
+
+def add_requests(c, *names):
+    for name in names:
+        c.execute(f"INSERT INTO eventreq({REQUEST[0]}) VALUES ({REQUEST[1].format(name=name)})")
+    return [r["eventid"] for r in c.execute("SELECT eventid FROM eventreq ORDER BY eventid").fetchall()]
+
+
+def test_approve_publishes_and_queues_mails(cursor):
+    event_index.load_from(cursor)
+    ids = add_requests(cursor, "Camp A", "Camp B")
+    result = approve_requests(cursor, ids + [999])
+    assert result["skipped"] == {999: "Not pending"}
+    assert sorted(result["approved"]) == ids
+    assert cursor.execute("SELECT COUNT(*) AS n FROM eventreq").fetchone()["n"] == 0
+    assert cursor.execute("SELECT COUNT(*) AS n FROM mail_outbox").fetchone()["n"] == 2
+    assert all(event_index.get(eid) for eid in result["approved"].values())
+
+
+def test_approve_never_reuses_an_ended_event_id(cursor):
+    cursor.execute("INSERT INTO event_likes(username, eventid) VALUES ('bob', 2)")
+    cursor.execute("INSERT INTO mail_outbox(idempotency_key, params) VALUES ('event-approved:2', '{}')")
+    cursor.execute("INSERT INTO endedevent SELECT eventid, eventname, email, eventstarttime, eventendtime, eventstartdate, "
+                   "eventenddate, location, category, description, username, likes FROM eventdetail WHERE eventid=2")
+    cursor.execute("DELETE FROM eventdetail WHERE eventid=2")
+    ids = add_requests(cursor, "Camp F", "Camp G")  # request ids 1 and 2
+    result = approve_requests(cursor, ids)
+
+    assert set(result["approved"]) == set(ids)
+    assert not set(result["approved"].values()) & {1, 2}
+    for eid in result["approved"].values():
+        assert cursor.execute("SELECT likes FROM eventdetail WHERE eventid=?", (eid,)).fetchone()["likes"] == 0
+        assert cursor.execute("SELECT 1 FROM event_likes WHERE eventid=?", (eid,)).fetchone() is None
+    assert cursor.execute("SELECT COUNT(*) AS n FROM mail_outbox WHERE idempotency_key LIKE 'event-approved:%'").fetchone()["n"] == 3
+
+
+def test_failed_approve_changes_nothing(cursor, monkeypatch):
+    event_index.load_from(cursor)
+    ids = add_requests(cursor, "Camp C")
+    before = len(event_index)
+
+    def broken(c, mails):
+        raise RuntimeError("outbox down")
+    monkeypatch.setattr(moderation, "enqueue_mails", broken)
+    with pytest.raises(RuntimeError):
+        approve_requests(cursor, ids)
+    assert cursor.execute("SELECT COUNT(*) AS n FROM eventreq").fetchone()["n"] == 1
+    assert cursor.execute("SELECT COUNT(*) AS n FROM eventdetail WHERE eventname='Camp C'").fetchone()["n"] == 0
+    assert len(event_index) == before
+
+
+def test_decline_drops_requests_with_one_reason(cursor):
+    ids = add_requests(cursor, "Camp D", "Camp E")
+    result = decline_requests(cursor, ids, "spam", "admin")
+    assert result == {"declined": ids, "skipped": {}}
+    assert cursor.execute("SELECT COUNT(*) AS n FROM mail_outbox").fetchone()["n"] == 2
@@ -0,0 +1,29 @@
+from modules import outbox
+from modules.add_event import addevent
+from modules.outbox import claim_mail, deliver, enqueue_mails, record_delivery
+from tests.test_events import FORM
+
+
+def test_every_attempt_uses_the_row_key(cursor, monkeypatch):
+    enqueue_mails(cursor, [(f"k{i}", "b@x", "Hi", "text") for i in range(3)])
+    calls = []
+
+    def send(params, key):
+        calls.append(key)
+        if key == "k1" and calls.count("k1") == 1:
+            raise TimeoutError("accepted upstream, timed out here")
+    monkeypatch.setattr(outbox, "send_resend", send)
+
+    sent, failures = deliver(claim_mail(cursor))
+    assert sorted(calls) == ["k0", "k1", "k2"] and list(failures) == [2]
+    record_delivery(cursor, sent, failures)
+    cursor.execute("UPDATE mail_outbox SET next_attempt_at=0")
+    sent, failures = deliver(claim_mail(cursor))
+    assert calls[3:] == ["k1"] and sent == [2] and not failures
+
+
+def test_the_sender_is_woken_after_the_commit(cursor, monkeypatch):
+    woken = []
+    monkeypatch.setattr(outbox.outbox_wakeup, "set", lambda: woken.append(cursor.connection.in_transaction))
+    assert addevent(cursor, FORM, "bob") == "Event added!"
+    assert woken == [False]
@@ -0,0 +1,23 @@
+from modules import search_index
+from modules.search_index import SearchIndex
+
+
+def event(eid, name):
+    return {"eventid": eid, "eventname": name, "category": "", "location": "", "description": ""}
+
+
+def test_prefix_expansion_keeps_the_most_common_words(monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_EXPANSIONS", 3)
+    index = SearchIndex()
+    # "plaa".."plad" each name one event and sort before "plantation", which names three
+    index.load([event(1, "plaa"), event(2, "plab"), event(3, "plac"), event(4, "plad"),
+                event(5, "Tree plantation"), event(6, "plantation drive"), event(7, "plantation camp")])
+    assert {eid for eid, _ in index.search("pla")} >= {5, 6, 7}
+
+
+def test_prefix_expansion_keeps_the_exact_word(monkeypatch):
+    monkeypatch.setattr(search_index, "MAX_EXPANSIONS", 2)
+    index = SearchIndex()
+    index.load([event(1, "camp"), event(2, "campaign one"), event(3, "campaign two"),
+                event(4, "camping one"), event(5, "camping two")])
+    assert 1 in {eid for eid, _ in index.search("camp")}
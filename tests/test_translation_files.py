@@ -0,0 +1,72 @@
+import json
+import os
+import threading
+
+from modules.translation_files import TranslationFiles
+from modules.translations import TranslationStore
+
+
+def worker_files(tmp_path, store=None, **kwargs):
+    paths = {name: str(tmp_path / name) for name in
+             ("translations.json", "translations_backup.json", "translations.bin", "translations.journal")}
+    return TranslationFiles(store or TranslationStore(), *paths.values(), **kwargs)
+
+
+def seed(tmp_path):
+    (tmp_path / "translations.json").write_text(json.dumps({"Home": {"hi": "होम"}}), encoding="utf-8")
+
+
+def test_compaction_keeps_other_workers_translations(tmp_path):
+    seed(tmp_path)
+    a, b = worker_files(tmp_path), worker_files(tmp_path)
+    a.load(), b.load()
+    a.store.add("Events", "hi", "कार्यक्रम")
+    b.store.add("Likes", "hi", "पसंद")
+    b.flush()
+    a.compact()
+    b.compact()
+
+    fresh = worker_files(tmp_path)
+    fresh.load()
+    assert fresh.store.get("Home", "hi") == "होम"
+    assert fresh.store.get("Events", "hi") == "कार्यक्रम"
+    assert fresh.store.get("Likes", "hi") == "पसंद"
+
+
+def test_the_app_leaves_translations_json_alone(tmp_path):
+    seed(tmp_path)
+    before = (tmp_path / "translations.json").read_bytes()
+    files = worker_files(tmp_path)
+    files.load()
+    files.store.add("Events", "hi", "कार्यक्रम")
+    files.compact()
+    assert (tmp_path / "translations.json").read_bytes() == before
+
+    warmup = worker_files(tmp_path, write_json=True)
+    warmup.load()
+    warmup.compact()
+    assert json.loads((tmp_path / "translations.json").read_text(encoding="utf-8"))["Events"] == {"hi": "कार्यक्रम"}
+
+
+def test_workers_compacting_together_lose_nothing(tmp_path):
+    workers = [worker_files(tmp_path) for _ in range(3)]
+
+    def run(n, files):
+        for i in range(40):
+            files.store.add(f"text {n} {i}", "hi", f"अनुवाद {n} {i}")
+            if i % 3:
+                files.flush()
+            else:
+                files.compact()
+        files.flush()
+
+    threads = [threading.Thread(target=run, args=(n, f)) for n, f in enumerate(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    fresh = worker_files(tmp_path)
+    fresh.load()
+    assert all(fresh.store.get(f"text {n} {i}", "hi") == f"अनुवाद {n} {i}" for n in range(3) for i in range(40))
+    assert not [p for p in os.listdir(tmp_path) if p.endswith(".tmp")]
@@ -0,0 +1,39 @@
+import pytest
+
+from modules.translation_service import FakeBackend, TranslationService
+from modules.translations import TranslationStore
+
+
+def service(**kwargs):
+    return TranslationService(TranslationStore(), FakeBackend(delay=0.05), workers=1, window=0.05, **kwargs)
+
+
+def test_a_cancelled_request_does_not_stop_the_worker():
+    svc = service()
+    assert svc.request("Home", "hi").cancel()
+    assert svc.translate_many(["Events"], "hi", timeout=5) == ["[hi] Events"]
+    svc.shutdown(wait=True)
+
+
+def test_an_internal_error_fails_the_batch_and_later_requests_still_run(monkeypatch):
+    svc = service()
+
+    def broken(items, save_file=True):
+        raise RuntimeError("store down")
+    monkeypatch.setattr(svc.store, "add_many", broken)
+    with pytest.raises(RuntimeError):
+        svc.request("Home", "hi").result(5)
+    assert svc.translate_many(["Home"], "hi", timeout=5) == [None]
+
+    monkeypatch.undo()
+    assert svc.translate_many(["Events"], "hi", timeout=5) == ["[hi] Events"]
+    svc.shutdown(wait=True)
+
+
+def test_dead_workers_are_replaced():
+    svc = service()
+    svc.translate_many(["Home"], "hi", timeout=5)
+    svc.shutdown(wait=True)
+    svc._stopping = False  # as if the worker thread had died
+    assert svc.translate_many(["Events"], "hi", timeout=5) == ["[hi] Events"]
+    svc.shutdown(wait=True)
@@ -0,0 +1,108 @@
+"""Two app workers in separate processes, sharing rooms and emits through the local broker stand-in."""
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import pytest
+import requests
+import socketio
+
+from modules import migrate
+from tests import local_db
+from tests.conftest import ROOT
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(ready, what, timeout=20):
+    deadline = time.monotonic() + timeout
+    while not ready():
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"{what} did not start")
+        time.sleep(0.1)
+
+
+def responds(url):
+    try:
+        requests.get(f"{url}/no/such/page", timeout=1)
+        return True
+    except requests.ConnectionError:
+        return False
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Base URLs of two workers on one database, with the broker between them."""
+    db_path = str(tmp_path / "db.sqlite")
+    local_db.create(db_path)
+    db = local_db.connect(db_path)
+    migrate(db.cursor())
+    db.close()
+
+    sock = str(tmp_path / "broker.sock")
+    env = dict(os.environ, SQLITECLOUD=db_path, TRANSLATION_BACKEND="fake", SOCKETIO_MESSAGE_QUEUE=f"unix://{sock}")
+    log = open(tmp_path / "processes.log", "w")
+    procs = [subprocess.Popen([sys.executable, "-m", "modules.socket_broker", sock], cwd=ROOT, env=env,
+                              stdout=log, stderr=subprocess.STDOUT)]
+    try:
+        wait_for(lambda: os.path.exists(sock), "broker")
+        urls = []
+        for _ in range(2):
+            port = free_port()
+            procs.append(subprocess.Popen([sys.executable, "-m", "tests.worker", db_path, str(port)], cwd=ROOT, env=env,
+                                          stdout=log, stderr=subprocess.STDOUT))
+            urls.append(f"http://127.0.0.1:{port}")
+        for url in urls:
+            wait_for(lambda: responds(url), url)
+        yield urls
+    finally:
+        for p in reversed(procs):  # workers before the broker they listen to
+            p.terminate()
+            try:
+                p.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                p.kill()  # uvicorn waits on the pub/sub listener task
+                p.wait()
+        log.close()
+
+
+def client(url, *events):
+    """A polling Socket.IO client on `url`; returns (client, {event: [payloads]}, threading.Event per event)."""
+    sio = socketio.Client()
+    received = {e: [] for e in events}
+    arrived = {e: threading.Event() for e in events}
+    for e in events:
+        def handler(data, e=e):
+            received[e].append(data)
+            arrived[e].set()
+        sio.on(e, handler)
+    sio.connect(url, transports=["polling"])
+    return sio, received, arrived
+
+
+def test_emits_reach_clients_on_the_other_worker(workers):
+    first, second = workers
+    watcher, received, arrived = client(first, "new_message", "update_like")
+    sender, _, _ = client(second)
+    try:
+        watcher.call("join_chat", {"eventid": 1})
+        watcher.call("watch_events", {"eventids": [1]})
+
+        sender.call("add_grp_msg", {"username": "bob", "message": "see you there", "eventid": 1})
+        sender.call("addeventlike", {"eventid": 1, "byuser": "bob", "type": "add"})
+
+        assert arrived["new_message"].wait(10)
+        assert arrived["update_like"].wait(10)
+        assert received["new_message"][0]["message"] == "see you there"
+        assert received["update_like"][0] == {"eventid": 1, "likes": 1}
+    finally:
+        # abort: a plain disconnect waits out the pending long-poll, up to the 25s ping interval
+        watcher.eio.disconnect(abort=True)
+        sender.eio.disconnect(abort=True)
@@ -0,0 +1,18 @@
+"""
+One app worker in a process of its own, against a local SQLite file:
+
+    python -m tests.worker <db path> <port>
+
+The lifespan is off (no migrations, background loops or translation files);
+SOCKETIO_MESSAGE_QUEUE and the rest come from the environment.
+"""
+import sys
+
+import uvicorn
+
+from tests import local_db
+
+if __name__ == "__main__":
+    db_path, port = sys.argv[1], int(sys.argv[2])
+    local_db.use_sqlite(db_path)
+    uvicorn.run("app:app", host="127.0.0.1", port=port, lifespan="off", log_level="warning")